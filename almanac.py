@@ -0,0 +1,142 @@
+import os
+import re
+import tarfile
+import time
+import zipfile
+
+from contextlib import closing
+
+# Exports are archived with or without their almanac_YYYY folder, so
+# member names are taken from the first of these directories on
+DIRECTORIES = ['players', 'leagues', 'teams']
+
+def find_player_files(root):
+    for dirname, dirnames, filenames in os.walk(root + '/players'):
+        for filename in filenames:
+            if filename[0] == '.':
+                continue
+            yield player_id(filename), os.path.join(dirname, filename)
+
+def player_id(filename):
+    return int(filename[len('player_'):filename.find('.')])
+
+def almanac_year(root):
+    return int(re.search(r'almanac_(\d+)', root).group(1))
+
+def relative_name(name):
+    parts = name.split('/')
+    for i, part in enumerate(parts):
+        if part in DIRECTORIES:
+            return '/'.join(parts[i:])
+    return None
+
+def is_player_page(name):
+    return name.startswith('players/') and not os.path.basename(name).startswith('.')
+
+def open_almanac(root):
+    if os.path.isfile(root):
+        if zipfile.is_zipfile(root):
+            return ZipAlmanac(root)
+        if tarfile.is_tarfile(root):
+            return TarAlmanac(root)
+    return DirectoryAlmanac(root)
+
+class Member:
+    # One player page; its contents are only read if someone asks
+    def __init__(self, name, size, mtime, reader):
+        self.name = name
+        self.player_id = player_id(os.path.basename(name))
+        self.size = size
+        self.mtime = mtime
+        self.reader = reader
+        self.html = None
+
+    def read(self):
+        if self.html is None:
+            self.html = self.reader()
+        return self.html
+
+class DirectoryAlmanac:
+    def __init__(self, root):
+        self.root = root
+
+    def player_pages(self, player_ids=None):
+        for player_id, filename in find_player_files(self.root):
+            if player_ids is not None and player_id not in player_ids:
+                continue
+            stat = os.stat(filename)
+            yield Member(os.path.relpath(filename, self.root), stat.st_size, stat.st_mtime,
+                         lambda filename=filename: read_file(filename))
+
+    def read(self, name):
+        return read_file(os.path.join(self.root, name))
+
+    def close(self):
+        pass
+
+def read_file(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+class ZipAlmanac:
+    def __init__(self, path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self.infos = {}
+        for info in self.archive.infolist():
+            name = relative_name(info.filename)
+            if name is not None and not info.filename.endswith('/'):
+                self.infos[name] = info
+
+    def player_pages(self, player_ids=None):
+        for info in self.archive.infolist():
+            name = relative_name(info.filename)
+            if name is not None and is_player_page(name) and not info.filename.endswith('/'):
+                if player_ids is not None and player_id(os.path.basename(name)) not in player_ids:
+                    continue
+                yield Member(name, info.file_size, time.mktime(info.date_time + (0, 0, -1)),
+                             lambda info=info: self.archive.read(info))
+
+    def read(self, name):
+        if name not in self.infos:
+            raise IOError('No member %s in %s' % (name, self.path))
+        return self.archive.read(self.infos[name])
+
+    def close(self):
+        self.archive.close()
+
+class TarAlmanac:
+    # A compressed tar can only be read front to back, so player pages are
+    # streamed in archive order and everything else seen along the way is
+    # kept for read(), which otherwise costs one more pass
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+
+    def members(self):
+        with closing(tarfile.open(self.path, 'r|*')) as archive:
+            for info in archive:
+                name = relative_name(info.name)
+                if name is not None and info.isfile():
+                    yield name, info, archive
+
+    def player_pages(self, player_ids=None):
+        for name, info, archive in self.members():
+            if is_player_page(name):
+                if player_ids is not None and player_id(os.path.basename(name)) not in player_ids:
+                    continue
+                yield Member(name, info.size, info.mtime, archive.extractfile(info).read)
+            else:
+                self.files[name] = archive.extractfile(info).read()
+
+    def read(self, name):
+        if name not in self.files:
+            for member_name, info, archive in self.members():
+                if member_name == name or not is_player_page(member_name):
+                    self.files[member_name] = archive.extractfile(info).read()
+        if name not in self.files:
+            raise IOError('No member %s in %s' % (name, self.path))
+        return self.files[name]
+
+    def close(self):
+        self.files = {}
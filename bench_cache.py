@@ -0,0 +1,73 @@
+import argparse
+import random
+import time
+
+from bench_helpers import max_rss_kb, run_separately
+from rating_cache import PITCH_COLUMNS, PITCHES, RatingCache, pitch_row
+
+WIDTHS = [('batting', 20), ('pitching', 14), ('run', 5), ('fielding', 9), ('position', 9)]
+
+def ratings(rng, width):
+    return [rng.randint(1, 16) * 5 for i in range(width)]
+
+def pitches(rng):
+    result = {}
+    for pitch in rng.sample(PITCHES, rng.randint(2, 5)):
+        result[pitch] = rng.randint(1, 16) * 5
+        result['pot_' + pitch] = rng.randint(1, 16) * 5
+    return result
+
+def build(variant, players, seed):
+    # Mirrors what Scraper keeps: one cache per ratings table plus pitch ratings
+    rng = random.Random(seed)
+    caches = {}
+    for name, width in WIDTHS:
+        cache = {} if variant == 'dict' else RatingCache(width)
+        for player_id in range(players):
+            if variant == 'dict':
+                cache[player_id] = ratings(rng, width)
+            else:
+                cache.set(player_id, ratings(rng, width))
+        caches[name] = cache
+    cache = {} if variant == 'dict' else RatingCache(len(PITCH_COLUMNS))
+    for player_id in range(players):
+        if variant == 'dict':
+            cache[player_id] = pitches(rng)
+        else:
+            cache.set(player_id, pitch_row(pitches(rng)))
+    caches['pitch'] = cache
+    return caches
+
+def bench(variant, players, changed):
+    base_rss = max_rss_kb()
+    start = time.time()
+    caches = build(variant, players, 0)
+    load = time.time() - start
+    rss = max_rss_kb() - base_rss
+
+    # Rebuild the same batting rows as fresh pages, with a fraction changed
+    rng = random.Random(0)
+    pages = [ratings(rng, 20) for player_id in range(players)]
+    rng = random.Random(1)
+    for player_id in rng.sample(range(players), int(players * changed)):
+        pages[player_id][0] += 1
+    cache = caches['batting']
+    start = time.time()
+    if variant == 'dict':
+        differing = sum(1 for player_id in range(players) if cache.get(player_id, []) != pages[player_id])
+    else:
+        differing = sum(1 for player_id in range(players) if cache.changed(player_id, pages[player_id]))
+    compare = time.time() - start
+    print '%-6s %6d players  caches +%6d KB  load %5.2fs  compare %6.1f ms (%d changed)' % (
+        variant, players, rss, load, compare * 1000, differing)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--players', type=int, default=50000)
+    parser.add_argument('--changed', type=float, default=0.1)
+    parser.add_argument('--variant', default=None, choices=['dict', 'array'])
+    args = parser.parse_args()
+    if args.variant:
+        bench(args.variant, args.players, args.changed)
+    else:
+        run_separately(__file__, ['--players', str(args.players), '--changed', str(args.changed)], '--variant', ['dict', 'array'])
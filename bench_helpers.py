@@ -0,0 +1,15 @@
+import resource
+import subprocess
+import sys
+
+def max_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss / 1024
+    return rss
+
+def run_separately(script, args, option, values):
+    # Runs script once per value of option, each in its own process so
+    # peak RSS is not shared
+    for value in values:
+        subprocess.check_call([sys.executable, script] + args + [option, value])
@@ -0,0 +1,63 @@
+import argparse
+import cProfile
+import pstats
+import re
+import time
+
+import scraper
+import statscraper
+from almanac import find_player_files
+from page_index import NODES, PageIndex
+from parsing import parse_player_page
+from sections import SECTIONS
+
+class SoupLookup:
+    # The lookups extractors made before PageIndex: every call is its own
+    # search of the tree, with the header regex compiled inline
+    def __init__(self, soup):
+        self.soup = soup
+
+    def header(self, text):
+        return self.soup.find(text=re.compile(text))
+
+    def table(self, i):
+        return self.soup.find_all('table', class_='data')[i]
+
+    def node(self, key):
+        tag, attr, value = NODES[key]
+        return self.soup.find(tag, {attr: value})
+
+def extract(lookup, year):
+    # What one ingest run asks of every page
+    scraper.extract_sections(lookup, True, SECTIONS)
+    statscraper.SeasonStats(year).extract_page(None, lookup)
+
+def run(variant, soups, year):
+    start = time.time()
+    for soup in soups:
+        if variant == 'index':
+            extract(PageIndex(soup), year)
+        else:
+            extract(SoupLookup(soup), year)
+    return time.time() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default=scraper.ROOT)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--year', type=int, default=2035)
+    parser.add_argument('--profile', action='store_true', help='print the busiest functions of each variant')
+    args = parser.parse_args()
+    soups = []
+    for player_id, filename in list(find_player_files(args.root))[:args.limit]:
+        with open(filename, 'rb') as f:
+            soups.append(parse_player_page(f.read()))
+    for variant in ['find', 'index']:
+        if args.profile:
+            profile = cProfile.Profile()
+            profile.runcall(run, variant, soups, args.year)
+            print '== ' + variant
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(12)
+        else:
+            elapsed = run(variant, soups, args.year)
+            print '%-6s %5d files  %7.2f ms/file' % (variant, len(soups), elapsed * 1000 / max(len(soups), 1))
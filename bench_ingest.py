@@ -0,0 +1,96 @@
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from almanac import almanac_year, open_almanac
+from bench_helpers import max_rss_kb, run_separately
+from contextlib import closing
+
+import scraper
+import statscraper
+import team_populator
+import upcoming_fa_populator
+
+TARGETS = ['scraper', 'teams', 'upcoming_fa', 'season_stats']
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+def find_snapshots(root):
+    # As written by gen_almanac.py, oldest first; each may be a directory or an archive
+    snapshots = glob.glob(os.path.join(root, 'snapshot_*', 'almanac_*'))
+    return sorted(snapshots, key=lambda path: int(path.split(os.sep)[-2][len('snapshot_'):]))
+
+def count_players(root):
+    with closing(open_almanac(root)) as almanac:
+        return sum(1 for page in almanac.player_pages())
+
+# Each returns the number of files read and the time taken, leaving out
+# the counting itself
+
+def run_scraper(snapshots, workers):
+    files = sum(count_players(root) for root in snapshots)
+    start = time.time()
+    for root in snapshots:
+        scraper.ROOT = root
+        scraper.Scraper().scrape(workers)
+    return files, time.time() - start
+
+def run_teams(snapshots, workers):
+    start = time.time()
+    populator = team_populator.TeamPopulator(workers)
+    with closing(open_almanac(snapshots[-1])) as almanac:
+        populator.read_leagues(almanac)
+        populator.read_teams(almanac)
+    return len(scraper.LEAGUES) + len(populator.ml_teams), time.time() - start
+
+def run_upcoming_fa(snapshots, workers):
+    start = time.time()
+    populator = upcoming_fa_populator.UpcomingFreeAgentPopulator(workers)
+    with closing(open_almanac(snapshots[-1])) as almanac:
+        populator.read_leagues(almanac)
+    populator.insert()
+    return len(scraper.LEAGUES) * 2, time.time() - start
+
+def run_season_stats(snapshots, workers):
+    files = count_players(snapshots[-1])
+    start = time.time()
+    statscraper.FILE_ROOT = snapshots[-1]
+    statscraper.season_scrape(str(almanac_year(snapshots[-1])))
+    return files, time.time() - start
+
+def bench(target, root, workers):
+    snapshots = find_snapshots(root)
+    if target == 'season_stats' and almanac_year(snapshots[-1]) != 2035:
+        # Any other year makes season_scrape fetch pages over HTTP
+        print '%-12s skipped, season_scrape only reads local files for 2035' % target
+        return
+    database = os.path.join(tempfile.mkdtemp(), 'wbh.db')
+    with closing(sqlite3.connect(database)) as db:
+        with open(SCHEMA) as f:
+            db.executescript(f.read())
+    for module in [scraper, statscraper, team_populator, upcoming_fa_populator]:
+        module.DATABASE = database
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        files, elapsed = globals()['run_' + target](snapshots, workers)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    print '%-12s %6d files  %7.1fs  %7.1f files/sec  peak RSS %d KB' % (
+        target, files, elapsed, files / max(elapsed, 0.001), max_rss_kb())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('root', help='a tree written by gen_almanac.py')
+    parser.add_argument('--target', default=None, choices=TARGETS)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    if args.target:
+        bench(args.target, args.root, args.workers)
+    else:
+        # Each target also gets its own database
+        run_separately(__file__, [args.root, '--workers', str(args.workers)], '--target', TARGETS)
@@ -0,0 +1,62 @@
+import argparse
+import gc
+import time
+
+import scraper
+from almanac import find_player_files
+from bench_helpers import max_rss_kb, run_separately
+from page_index import PageIndex
+from parsing import BACKENDS, parse_player_page
+from sections import SECTIONS, read_sections
+
+EXTRACTORS = [
+    scraper.extract_date,
+    scraper.extract_player,
+    lambda index: read_sections(index, SECTIONS, {})
+]
+
+def bench(backend, filenames):
+    pages = []
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            pages.append(f.read())
+    base_rss = max_rss_kb()
+    times = []
+    for html in pages:
+        start = time.time()
+        soup = parse_player_page(html, backend)
+        times.append(time.time() - start)
+        del soup
+        gc.collect()
+    times.sort()
+    print '%-14s %6d files  mean %7.2f ms  median %7.2f ms  peak +%d KB' % (
+        backend, len(times), sum(times) * 1000 / len(times), times[len(times) / 2] * 1000, max_rss_kb() - base_rss)
+
+def check(filenames):
+    mismatches = 0
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            html = f.read()
+        results = {}
+        for backend in BACKENDS:
+            index = PageIndex(parse_player_page(html, backend))
+            results[backend] = [extractor(index) for extractor in EXTRACTORS]
+        if len(set(repr(result) for result in results.values())) > 1:
+            mismatches += 1
+            print 'Backends disagree on ' + filename
+    print '%d of %d files extracted differently' % (mismatches, len(filenames))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default=scraper.ROOT)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--backend', default=None, choices=sorted(BACKENDS))
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+    filenames = [filename for player_id, filename in find_player_files(args.root)][:args.limit]
+    if args.backend:
+        bench(args.backend, filenames)
+    elif args.check:
+        check(filenames)
+    else:
+        run_separately(__file__, ['--root', args.root, '--limit', str(args.limit)], '--backend', sorted(BACKENDS))
@@ -0,0 +1,53 @@
+WRITE_BATCH_SIZE = 1000
+
+class BulkWriter:
+    # Rows passed to add() are buffered per statement and written with
+    # executemany, so they may reach the database out of order relative to
+    # other statements. Anything order sensitive (updates, deletes, inserts
+    # that can collide with a buffered row) goes through execute(), which
+    # flushes every buffer first. Nothing is committed until commit(), so an
+    # interrupted run only loses what it wrote since it last committed.
+    def __init__(self, db, chunk_size=WRITE_BATCH_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.statements = []
+        self.rows = {}
+        self.count = 0
+
+    def add(self, sql, params):
+        if sql not in self.rows:
+            self.statements.append(sql)
+            self.rows[sql] = []
+        rows = self.rows[sql]
+        rows.append(params)
+        if len(rows) >= self.chunk_size:
+            self.flush_statement(sql)
+
+    def execute(self, sql, params=()):
+        self.flush()
+        cur = self.db.cursor()
+        cur.execute(sql, params)
+        return cur
+
+    def flush_statement(self, sql):
+        rows = self.rows[sql]
+        if len(rows) > 0:
+            self.db.cursor().executemany(sql, rows)
+            self.count += len(rows)
+            self.rows[sql] = []
+
+    def flush(self):
+        for sql in self.statements:
+            self.flush_statement(sql)
+
+    def commit(self):
+        self.flush()
+        self.db.commit()
+
+def load_player_ids(cur, table, player_ids):
+    # Fills a temp table of player ids for set-based statements to join
+    # against. Call it before anything else is written in the transaction:
+    # the sqlite3 module commits ahead of a create, which would split it.
+    cur.execute('create temp table if not exists %s (player_id INTEGER PRIMARY KEY)' % table)
+    cur.execute('delete from %s' % table)
+    cur.executemany('insert or ignore into %s (player_id) values (?)' % table, [[player_id] for player_id in player_ids])
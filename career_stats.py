@@ -0,0 +1,101 @@
+import argparse
+import sqlite3
+
+from bulk_writer import BulkWriter
+from contextlib import closing
+
+import rate_stats
+
+DATABASE = 'wbh.db'
+
+# Careers are the seasons summed. The position is the one played in the
+# most games, the name the latest. The rates are left to rate_stats, so
+# they come out exactly as compile_batting_stats and
+# compile_pitching_stats would have them.
+CAREER_BATTING = '''
+    insert or replace into batting_stats
+    (player_id, name, position,
+     g, ab, h, double, triple, hr,
+     rbi, r, bb, hp, sf, k, sb, cs,
+     vorp, war)
+    select
+      player_id,
+      (select name from season_batting_stats n
+       where n.player_id = s.player_id
+       order by year desc limit 1),
+      (select position from season_batting_stats p
+       where p.player_id = s.player_id
+       group by position order by sum(g) desc limit 1),
+      sum(g), sum(ab), sum(h), sum(double), sum(triple), sum(hr),
+      sum(rbi), sum(r), sum(bb), sum(hp), sum(sf), sum(k),
+      sum(sb), sum(cs), round(sum(vorp), 1), round(sum(war), 1)
+    from season_batting_stats s
+    {where}
+    group by player_id
+    having sum(ab) > 0
+    '''
+
+# Innings are kept as whole innings and thirds, 45.2 for 45 2/3, so they
+# are summed as outs
+CAREER_PITCHING = '''
+    insert or replace into pitching_stats
+    (player_id, name, g, gs, w, l, sv, ip, ha, r, er, hr, bb, k, cg, sho, vorp, war)
+    select
+      player_id, name, g, gs, w, l, sv,
+      round(outs / 3 + (outs % 3) / 10.0, 1),
+      ha, r, er, hr, bb, k, cg, sho, vorp, war
+    from (
+      select
+        player_id,
+        (select name from season_pitching_stats n
+         where n.player_id = s.player_id
+         order by year desc limit 1) as name,
+        sum(g) as g, sum(gs) as gs, sum(w) as w, sum(l) as l, sum(sv) as sv,
+        sum(cast(ip as integer) * 3 + cast(round((ip - cast(ip as integer)) * 10) as integer)) as outs,
+        sum(ha) as ha, sum(r) as r, sum(er) as er, sum(hr) as hr, sum(bb) as bb, sum(k) as k,
+        sum(cg) as cg, sum(sho) as sho, round(sum(vorp), 1) as vorp, round(sum(war), 1) as war
+      from season_pitching_stats s
+      {where}
+      group by player_id
+      having outs > 0)
+    '''
+
+BATTING_WHERE = '''
+    where player_id in (select player_id from season_batting_stats where year = ?)
+    '''
+PITCHING_WHERE = '''
+    where player_id in (select player_id from season_pitching_stats where year = ?)
+    '''
+
+def rebuild(db, year=None):
+    # Every career, or with a year only those of players with a season in
+    # it, which are the only ones a new export of that season can change.
+    # db is a connection or a BulkWriter.
+    if isinstance(db, BulkWriter):
+        # Its buffered season rows have to be in before they are summed
+        db.flush()
+        db = db.db
+    batting_where = pitching_where = ''
+    params = []
+    if year is None:
+        db.execute('delete from batting_stats')
+        db.execute('delete from pitching_stats')
+    else:
+        batting_where = BATTING_WHERE
+        pitching_where = PITCHING_WHERE
+        params = [year]
+    batting = db.execute(CAREER_BATTING.format(where=batting_where), params)
+    pitching = db.execute(CAREER_PITCHING.format(where=pitching_where), params)
+    print '%d batting and %d pitching careers' % (batting.rowcount, pitching.rowcount)
+    rate_stats.recompute(db, 'batting_stats', rate_stats.BATTING_COUNTS, rate_stats.BATTING_RATES,
+                         rate_stats.batting_rates, where=batting_where, params=params)
+    rate_stats.recompute(db, 'pitching_stats', rate_stats.PITCHING_COUNTS, rate_stats.PITCHING_RATES,
+                         rate_stats.pitching_rates, where=pitching_where, params=params)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--year', type=int, default=None, help='only update players with a season in this year')
+    args = parser.parse_args()
+    with closing(sqlite3.connect(DATABASE)) as db:
+        rebuild(db, args.year)
+        db.commit()
@@ -0,0 +1,70 @@
+from collections import deque
+
+# Pages between commits when a run is checkpointed
+CHECKPOINT_PAGES = 500
+
+class Checkpoint:
+    # Progress of one run: its phase, and the last player it committed
+    # with that player's position in the order pages were read
+    def __init__(self, db, run_id):
+        self.run_id = run_id
+        self.phase = None
+        self.player_id = None
+        self.position = -1
+        cur = db.cursor()
+        cur.execute('''
+            select phase, player_id, position
+            from scrape_checkpoints
+            where run_id = ?
+            ''', [run_id])
+        row = cur.fetchone()
+        if row is not None:
+            self.phase, self.player_id, self.position = row
+        # Where a resumed run picks up; the fields above move as it goes
+        self.resume_phase = self.phase
+        self.resume_player_id = self.player_id
+        self.resume_position = self.position
+        self.in_flight = deque()
+        self.written = 0
+
+    def pages(self, pages, resume=False):
+        if resume and self.resume_phase not in (None, 'players'):
+            return
+        for position, page in enumerate(pages):
+            page.position = position
+            if resume and position <= self.resume_position:
+                if position == self.resume_position and page.player_id != self.resume_player_id:
+                    raise ValueError('%s stopped at player %d, not %d; the export has changed, run without --resume' % (
+                        self.run_id, self.resume_player_id, page.player_id))
+                continue
+            yield page
+
+    def track(self, pages):
+        # Pool results come back in order, so the oldest page in flight is
+        # always the one just written
+        for page in pages:
+            self.in_flight.append((page.player_id, page.position, page.mark))
+            yield page
+
+    def page_written(self, writer, manifest):
+        self.player_id, self.position, mark = self.in_flight.popleft()
+        self.written += 1
+        if self.written % CHECKPOINT_PAGES == 0:
+            manifest.save(writer, mark)
+            self.save(writer, 'players')
+            writer.commit()
+
+    def reached(self, db, player_id, position):
+        # For runs that commit each player themselves
+        self.player_id = player_id
+        self.position = position
+        self.save(db, 'players')
+
+    def save(self, db, phase):
+        self.phase = phase
+        db.execute('''
+            insert or replace into scrape_checkpoints
+            (run_id, phase, player_id, position)
+            values
+            (?, ?, ?, ?)
+            ''', [self.run_id, phase, self.player_id, self.position])
@@ -0,0 +1,129 @@
+import re
+
+from HTMLParser import HTMLParser
+from page_index import HEADERS, NODES
+
+# A PageIndex look-alike that works on the page source directly instead of
+# a parsed tree. Nodes are just spans of the source and only offer the bit
+# of the BeautifulSoup API the extractors use: find_all, text and get.
+
+COMMENT = re.compile(r'<!--.*?-->', re.S)
+TAG = re.compile(r'<[^>]*>')
+OPEN_TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)\b([^>]*)>')
+ATTRIBUTE = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+TAGS = {}
+
+unescape = HTMLParser().unescape
+
+class NoMatch(Exception):
+    pass
+
+def tag_pattern(name):
+    if name not in TAGS:
+        TAGS[name] = (re.compile(r'<%s\b([^>]*)>' % name, re.I), re.compile(r'<(/?)%s\b[^>]*>' % name, re.I))
+    return TAGS[name]
+
+def parse_attributes(source):
+    attrs = {}
+    for match in ATTRIBUTE.finditer(source):
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+        attrs[match.group(1).lower()] = unescape(value)
+    return attrs
+
+def matches(attrs, attr, value):
+    if attr not in attrs:
+        return False
+    if attr == 'class':
+        return value in attrs[attr].split()
+    return attrs[attr] == value
+
+class Node:
+    def __init__(self, html, name, attrs, start, end):
+        self.html = html
+        self.name = name
+        self.attrs = attrs
+        # start and end of the element's contents, between its tags
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self):
+        return unescape(TAG.sub('', self.html[self.start:self.end]))
+
+    def get(self, attr):
+        return self.attrs.get(attr)
+
+    def find_all(self, name):
+        return find_all(self.html, name, self.start, self.end)
+
+def element_end(html, name, pos, end):
+    # Counts nested elements of the same name; a page leaning on implied
+    # end tags is not one this index can read
+    depth = 1
+    for match in tag_pattern(name)[1].finditer(html, pos, end):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                return match.start(), match.end()
+        else:
+            depth += 1
+    raise NoMatch('No closing </%s>' % name)
+
+def find_all(html, name, start, end):
+    nodes = []
+    for match in tag_pattern(name)[0].finditer(html, start, end):
+        content_end, close_end = element_end(html, name, match.end(), end)
+        nodes.append(Node(html, name, parse_attributes(match.group(1)), match.end(), content_end))
+    return nodes
+
+class FastIndex:
+    def __init__(self, html):
+        try:
+            html = html.decode('utf-8')
+        except UnicodeDecodeError:
+            raise NoMatch('Not UTF-8')
+        html = COMMENT.sub('', html)
+        self.html = html
+        self.headers = {}
+        for header in HEADERS:
+            text = self.find_text(header)
+            if text is not None:
+                self.headers[header] = text
+        self.data_tables = [table for table in find_all(html, 'table', 0, len(html))
+                            if matches(table.attrs, 'class', 'data')]
+        self.nodes = {}
+        for key, (name, attr, value) in NODES.items():
+            for match in tag_pattern(name)[0].finditer(html):
+                attrs = parse_attributes(match.group(1))
+                if matches(attrs, attr, value):
+                    content_end, close_end = element_end(html, name, match.end(), len(html))
+                    self.nodes[key] = Node(html, name, attrs, match.end(), content_end)
+                    break
+
+    def find_text(self, text):
+        # The whole text between two tags, as soup.find(text=...) returns
+        pos = self.html.find(text)
+        while pos >= 0:
+            if self.html.rfind('>', 0, pos) >= self.html.rfind('<', 0, pos):
+                start = self.html.rfind('>', 0, pos) + 1
+                end = self.html.find('<', pos)
+                if end < 0:
+                    end = len(self.html)
+                return unescape(self.html[start:end])
+            pos = self.html.find(text, pos + 1)
+        return None
+
+    def header(self, text):
+        return self.headers.get(text)
+
+    def table(self, i):
+        if i >= len(self.data_tables):
+            raise NoMatch('No table.data %d' % i)
+        return self.data_tables[i]
+
+    def node(self, key):
+        return self.nodes.get(key)
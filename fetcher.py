@@ -0,0 +1,180 @@
+import httplib
+import random
+import socket
+import threading
+import time
+import urlparse
+
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+# Requests in flight at once, and the most a second to any one host
+CONCURRENCY = 8
+RATE = 20.0
+RETRIES = 3
+# Seconds before the first retry; each one after waits twice as long
+BACKOFF = 0.5
+TIMEOUT = 30
+# Worth asking again for; any other error status means there is no page
+RETRY_STATUSES = set([429, 500, 502, 503, 504])
+
+class FetchError(Exception):
+    pass
+
+class RateLimit:
+    # Spaces requests at least 1 / rate seconds apart across all threads
+    def __init__(self, rate):
+        self.interval = 0
+        if rate > 0:
+            self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0
+
+    def wait(self):
+        with self.lock:
+            now = time.time()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class Fetcher:
+    # Fetches pages under one URL with a pool of threads. Each thread keeps
+    # its own connection open between requests, so a run opens about as
+    # many connections as it has threads rather than one per page. With a
+    # cache, pages it holds are only fetched again if the server says they
+    # have changed, and offline they are not asked for at all.
+    def __init__(self, url_root, concurrency=CONCURRENCY, rate=RATE, retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT,
+                 cache=None, offline=False):
+        url = urlparse.urlsplit(url_root)
+        self.scheme = url.scheme
+        self.host = url.netloc
+        self.path = url.path.rstrip('/')
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.offline = offline
+        self.limits = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pool = None
+        self.requests = 0
+        self.retried = 0
+        self.missing = 0
+        self.connections = 0
+        self.hits = 0
+        self.uncached = 0
+
+    def limit(self, host):
+        with self.lock:
+            if host not in self.limits:
+                self.limits[host] = RateLimit(self.rate)
+            return self.limits[host]
+
+    def connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            if self.scheme == 'https':
+                self.local.connection = httplib.HTTPSConnection(self.host, timeout=self.timeout)
+            else:
+                self.local.connection = httplib.HTTPConnection(self.host, timeout=self.timeout)
+            with self.lock:
+                self.connections += 1
+        return self.local.connection
+
+    def drop_connection(self):
+        if getattr(self.local, 'connection', None) is not None:
+            self.local.connection.close()
+            self.local.connection = None
+
+    def fetch(self, name):
+        # The page, or None if the server has none by that name. Gives up
+        # with a FetchError rather than skip a page it could not reach.
+        path = self.path + '/' + name
+        url = '%s://%s%s' % (self.scheme, self.host, path)
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(url)
+        if self.offline:
+            with self.lock:
+                if cached is None:
+                    self.uncached += 1
+                else:
+                    self.hits += 1
+            if cached is None or cached.status != 200:
+                return None
+            return cached.body
+        headers = {}
+        if cached is not None and cached.etag is not None:
+            headers['If-None-Match'] = cached.etag
+        if cached is not None and cached.last_modified is not None:
+            headers['If-Modified-Since'] = cached.last_modified
+        response, body = self.request(path, headers)
+        if response.status == 304 and cached is not None:
+            self.cache.revalidated(url)
+            with self.lock:
+                self.hits += 1
+            return cached.body
+        if response.status != 200:
+            body = None
+            with self.lock:
+                self.missing += 1
+        if self.cache is not None:
+            self.cache.put(url, response.status, body, response.getheader('etag'), response.getheader('last-modified'))
+        return body
+
+    def request(self, path, headers):
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                with self.lock:
+                    self.retried += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            self.limit(self.host).wait()
+            with self.lock:
+                self.requests += 1
+            try:
+                connection = self.connection()
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (socket.error, httplib.HTTPException), e:
+                # Most often a kept-alive connection the server has since closed
+                self.drop_connection()
+                error = '%s: %s' % (path, e)
+                continue
+            if response.status not in RETRY_STATUSES:
+                return response, body
+            error = '%s: HTTP %d' % (path, response.status)
+        raise FetchError('Gave up after %d retries, %s' % (self.retries, error))
+
+    def fetch_all(self, names):
+        # Takes (key, name) pairs and yields (key, page) in the same order,
+        # with at most twice the concurrency fetched ahead of the caller
+        if self.pool is None:
+            self.pool = ThreadPool(self.concurrency)
+        pending = deque()
+        for key, name in names:
+            pending.append((key, self.pool.apply_async(self.fetch, (name,))))
+            if len(pending) >= self.concurrency * 2:
+                key, result = pending.popleft()
+                yield key, result.get()
+        while len(pending) > 0:
+            key, result = pending.popleft()
+            yield key, result.get()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def print_stats(self):
+        print '%d requests, %d retried, %d missing, %d connections opened' % (
+            self.requests, self.retried, self.missing, self.connections)
+        if self.cache is not None:
+            print '%d pages from the cache, %d not in it' % (self.hits, self.uncached)
@@ -0,0 +1,269 @@
+import argparse
+import datetime
+import os
+import random
+import shutil
+
+LEAGUES = [100, 102, 104, 112, 116, 120, 124]
+LEVELS_BELOW = ['AAA', 'AA', 'A']
+PERSONALITY = ['Leadership', 'Loyalty', 'Desire for Win', 'Greed', 'Intelligence', 'Work Ethic']
+LEVELS = ['Very Low', 'Low', 'Normal', 'High', 'Very High']
+PITCHES = ['Fastball', 'Changeup', 'Curveball', 'Slider', 'Sinker', 'Splitter', 'Cutter',
+           'Forkball', 'Circle Change', 'Screwball', 'Knuckle Curve', 'Knuckleball']
+POSITIONS = ['C', '1B', '2B', '3B', 'SS', 'LF', 'CF', 'RF']
+
+def rating(rng):
+    return rng.randint(1, 10) * 5
+
+def cells(values):
+    return ''.join('<td>%s</td>' % v for v in values)
+
+def ratings_rows(rng, names):
+    rows = ['<tr class="hsn"><td colspan="7">RATINGS</td></tr>',
+            '<tr class="hsn">' + cells(['', '', '', 'OVR', 'vL', 'vR', 'POT']) + '</tr>']
+    for name in names:
+        rows.append('<tr>' + cells([name, '', ''] + [rating(rng) for i in range(4)]) + '</tr>')
+    return '\n'.join(rows)
+
+def batting_page(rng, year):
+    fielding = '\n'.join([
+        '<tr class="hsn"><td colspan="4">FIELDING RATINGS</td></tr>',
+        '<tr class="hsn">' + cells(['', 'C', 'IF', 'OF']) + '</tr>'] +
+        ['<tr>' + cells([name, rng.choice(['-', rating(rng)]), rating(rng), rating(rng)]) + '</tr>'
+         for name in ['Range', 'Errors', 'Arm', 'Turn DP', 'Ability']])
+    positions = ['P', 'SS', 'C', 'LF', '1B', 'CF', '2B', 'RF', '3B']
+    position = '\n'.join('<tr>' + cells([p, rng.choice(['-', rating(rng)])]) + '</tr>' for p in positions)
+    return '''
+<div class="sectitle">BATTING RATINGS</div>
+<table class="data">
+%s
+</table>
+<div class="sectitle">FIELDING RATINGS</div>
+<table class="data">
+%s
+</table>
+<div class="sectitle">POSITION RATINGS</div>
+<table class="data">
+%s
+</table>''' % (ratings_rows(rng, ['Contact', 'Gap', 'Power', 'Eye', 'Avoid K']), fielding, position)
+
+def pitching_page(rng):
+    pitches = rng.sample(PITCHES, rng.randint(2, 5))
+    pitch_rows = ['<tr class="hsn"><td colspan="3">PITCH RATINGS</td></tr>',
+                  '<tr class="hsn">' + cells(['Pitch', 'OVR', 'POT']) + '</tr>']
+    for pitch in pitches:
+        pitch_rows.append('<tr>' + cells([pitch, rating(rng), rating(rng)]) + '</tr>')
+    pitch_rows.append('<tr>' + cells(['&nbsp;', '', '']) + '</tr>')
+    velocity = rng.randint(85, 97)
+    other = '\n'.join([
+        '<tr class="hsn"><td colspan="2">OTHER</td></tr>',
+        '<tr>' + cells(['Velocity', '%d-%d Mph' % (velocity - 2, velocity)]) + '</tr>',
+        '<tr>' + cells(['Stamina', rating(rng)]) + '</tr>',
+        '<tr>' + cells(['Role', rng.choice(['Starter', 'Reliever', 'Closer'])]) + '</tr>',
+        '<tr>' + cells(['Groundball', '%d%%' % rng.randint(30, 70)]) + '</tr>',
+        '<tr>' + cells(['Hold', rating(rng)]) + '</tr>'])
+    return '''
+<div class="sectitle">PITCHING RATINGS</div>
+<table class="data">
+%s
+</table>
+<table class="data">
+%s
+</table>
+<table class="data">
+%s
+</table>''' % (ratings_rows(rng, ['Stuff', 'Movement', 'Control']), '\n'.join(pitch_rows), other)
+
+def run_table(rng):
+    rows = ['<tr class="hsn"><td colspan="2">BASERUNNING</td></tr>']
+    for name in ['Speed', 'Stealing', 'Baserunning', 'Sacrifice Bunt', 'Bunt for Hit']:
+        rows.append('<tr>' + cells([name, rating(rng)]) + '</tr>')
+    return '<table class="data">\n%s\n</table>' % '\n'.join(rows)
+
+def batting_stats(rng, first_year, year, position):
+    seasons = []
+    fielding = []
+    for y in range(first_year, year + 1):
+        ab = rng.randint(0, 600)
+        h = rng.randint(0, ab / 3 + 1)
+        values = [y, 20 + y - first_year, rng.randint(1, 162), ab, h, h / 5, h / 30, h / 10, h / 2,
+                  h / 2, rng.randint(0, 80), rng.randint(0, 10), rng.randint(0, 8), rng.randint(0, 150),
+                  rng.randint(0, 30), rng.randint(0, 10), '.250', '.320', '.400', '.720', '100',
+                  '%.1f' % rng.uniform(-5, 40), '%.1f' % rng.uniform(-1, 7)]
+        seasons.append(values)
+        fielding.append([y, position, values[2], 0, 0, 0, 0])
+    totals = [['WBH', ''] + [sum(s[i] for s in seasons) for i in range(2, 16)] +
+              ['.250', '.320', '.400', '.720', '100',
+               '%.1f' % sum(float(s[21]) for s in seasons), '%.1f' % sum(float(s[22]) for s in seasons)]]
+    return stats_tables('Career Batting Stats', seasons, totals) + stats_tables('CAREER FIELDING STATS', fielding, [])
+
+def pitching_stats(rng, first_year, year):
+    seasons = []
+    for y in range(first_year, year + 1):
+        ip = rng.randint(0, 200)
+        values = [y, 20 + y - first_year, rng.randint(1, 40), rng.randint(0, 33), rng.randint(0, 20),
+                  rng.randint(0, 20), rng.randint(0, 30), '4.00', '%d.%d' % (ip, rng.randint(0, 2)),
+                  ip, ip / 2, ip / 2 - 3 if ip > 6 else 0, ip / 10, ip / 3, ip, rng.randint(0, 3),
+                  rng.randint(0, 1), '1.30', '.300', '%.1f' % rng.uniform(-5, 40),
+                  '%.1f' % rng.uniform(-1, 7), '100']
+        seasons.append(values)
+    return stats_tables('Career Pitching Stats', seasons, [])
+
+def stats_tables(title, seasons, totals):
+    rows = ['<tr class="hsn">' + cells(['YEAR'] * 2) + '</tr>']
+    for values in seasons:
+        rows.append('<tr>\n' + cells(values) + '\n</tr>')
+    for values in totals:
+        rows.append('<tr class="hsx">' + ''.join('<th>%s</th>' % v for v in values) + '</tr>')
+    return '''
+<table class="repsubtitle"><tr><td>%s</td></tr></table>
+<table class="data">
+%s
+</table>''' % (title, '\n'.join(rows))
+
+def player_page(rng, player_id, date, year, team_ids):
+    # The page and the team it puts the player on
+    pitcher = rng.random() < 0.45
+    team_id = rng.choice(team_ids)
+    position = 'P' if pitcher else rng.choice(POSITIONS)
+    first_year = max(2006, year - rng.randint(0, 12))
+    birth_year = first_year - rng.randint(18, 24)
+    personality = '\n'.join('<tr><td>%s</td><td>%s</td></tr>' % (p, rng.choice(LEVELS)) for p in PERSONALITY)
+    ratings = pitching_page(rng) if pitcher else batting_page(rng, year)
+    if pitcher:
+        stats = pitching_stats(rng, first_year, year)
+    else:
+        stats = batting_stats(rng, first_year, year, position)
+    return team_id, '''<html>
+<head><title>Player Report</title></head>
+<body>
+<div style="text-align:center; color:#000000; padding-top:4px;">%s</div>
+<div class="reptitle">%s Player%d Name%d #%d</div>
+<table class="data">
+<tr><td><a class="boxlink" href="../teams/team_%s.html">Team</a></td></tr>
+<tr><td>Born:</td><td class="wrap">%02d/%02d/%d</td></tr>
+<tr><td>%s  BATS: %s  THROWS: %s</td></tr>
+</table>
+<table><tr><td width="172px"><table>
+%s
+</table></td></tr></table>
+%s
+%s
+%s
+</body>
+</html>
+''' % (date, position, player_id, player_id, rng.randint(1, 99), team_id if team_id else '',
+       rng.randint(1, 12), rng.randint(1, 28), birth_year, position,
+       rng.choice('LRS'), rng.choice('LR'), personality, ratings, run_table(rng), stats)
+
+
+def filler_tables(count):
+    return ['<table width="291px"><tr><td>&nbsp;</td></tr></table>'] * count
+
+def team_links(team_ids):
+    return '\n'.join('<tr><td><a href="../teams/team_%d.html">Team %d</a></td></tr>' % (team_id, team_id)
+                     for team_id in team_ids)
+
+def league_home_page(divisions):
+    # TeamPopulator reads the 4th and 6th 291px tables as the two divisions
+    tables = filler_tables(6)
+    tables[3] = '<table width="291px">\n%s\n</table>' % team_links(divisions[0])
+    tables[5] = '<table width="291px">\n%s\n</table>' % team_links(divisions[1])
+    return '<html><body>\n%s\n</body></html>\n' % '\n'.join(tables)
+
+def team_page(team_id, affiliates, roster):
+    # and the 8th 291px table of a major league team page as its affiliates.
+    # The roster follows, linking each player's page.
+    tables = filler_tables(8)
+    rows = ['<tr><td><a href="../teams/team_%d.html"><img title="Team%d Affiliate (%s)"></a></td></tr>' % (
+        affiliate, affiliate, level) for affiliate, level in affiliates]
+    tables[7] = '<table width="291px">\n<tr><td>AFFILIATES</td></tr>\n%s\n</table>' % '\n'.join(rows)
+    players = ['<tr><td><a href="../players/player_%d.html">Player%d</a></td></tr>' % (player_id, player_id)
+               for player_id in roster]
+    tables.append('<table class="data">\n<tr><td>ROSTER</td></tr>\n%s\n</table>' % '\n'.join(players))
+    return '<html><body>\n<div class="reptitle">Team%d City</div>\n%s\n</body></html>\n' % (
+        team_id, '\n'.join(tables))
+
+def upcoming_fa_page(player_ids, team_id):
+    rows = ['<tr><td><a href="../players/player_%d.html">Player%d</a></td>'
+            '<td><a href="../teams/team_%d.html">Team</a></td></tr>' % (player_id, player_id, team_id)
+            for player_id in player_ids]
+    return '<html><body>\n<table class="sortable">\n%s\n</table>\n</body></html>\n' % '\n'.join(rows)
+
+def build_teams(teams_per_division):
+    # Major league ids come first, then three affiliates per major league team
+    leagues = {}
+    affiliates = {}
+    next_id = 1
+    for league in LEAGUES:
+        divisions = []
+        for division in range(2):
+            divisions.append(range(next_id, next_id + teams_per_division))
+            next_id += teams_per_division
+        leagues[league] = divisions
+    for league in LEAGUES:
+        for division in leagues[league]:
+            for team_id in division:
+                affiliates[team_id] = zip(range(next_id, next_id + len(LEVELS_BELOW)), LEVELS_BELOW)
+                next_id += len(LEVELS_BELOW)
+    return leagues, affiliates, range(next_id)
+
+def write(filename, html):
+    with open(filename, 'w') as f:
+        f.write(html)
+
+def write_snapshot(root, date, seed, versions, leagues, affiliates, team_ids):
+    year = date.year
+    text_date = date.strftime('%m/%d/%Y')
+    for dirname in ['players', 'leagues', 'teams']:
+        os.makedirs(os.path.join(root, dirname))
+    rosters = {}
+    for player_id, version in enumerate(versions):
+        # A player's page only changes when its version does
+        rng = random.Random('%d:%d:%d' % (seed, player_id, version))
+        team_id, html = player_page(rng, player_id, text_date, year, team_ids)
+        rosters.setdefault(team_id, []).append(player_id)
+        write(root + '/players/player_%d.html' % player_id, html)
+
+    rng = random.Random('%d:%s' % (seed, text_date))
+    per_report = min(5, len(versions) / (len(LEAGUES) * 5))
+    picked = rng.sample(range(len(versions)), per_report * len(LEAGUES) * 5)
+    for i, league in enumerate(LEAGUES):
+        write(root + '/leagues/league_%d_home.html' % league, league_home_page(leagues[league]))
+        chunk = picked[i * per_report * 5:(i + 1) * per_report * 5]
+        write(root + '/leagues/league_%d_waiver_wire_block.html' % league,
+              '<html><body>' + ''.join('<a href="../players/player_%d.html">x</a>' % p for p in chunk[:per_report * 3]) + '</body></html>')
+        for report in range(2):
+            start = per_report * (3 + report)
+            write(root + '/leagues/league_%d_upcoming_free_agents_report_%d.html' % (league, report),
+                  upcoming_fa_page(chunk[start:start + per_report], leagues[league][0][0]))
+    for team_id in team_ids[1:]:
+        write(root + '/teams/team_%d.html' % team_id, team_page(team_id, affiliates.get(team_id, []), rosters.get(team_id, [])))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write fake almanac trees with the markup the scrapers read')
+    parser.add_argument('root', help='snapshots are written to <root>/snapshot_<n>/almanac_<year>')
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--dates', type=int, default=1, help='number of weekly snapshots')
+    parser.add_argument('--start', default='2035-04-01')
+    parser.add_argument('--changed', type=float, default=0.2, help='share of players whose page changes between snapshots')
+    parser.add_argument('--teams-per-division', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--archive', default=None, choices=['zip', 'gztar'], help='pack each snapshot and remove the tree')
+    args = parser.parse_args()
+    leagues, affiliates, team_ids = build_teams(args.teams_per_division)
+    date = datetime.datetime.strptime(args.start, '%Y-%m-%d').date()
+    versions = [0] * args.players
+    rng = random.Random(args.seed)
+    for snapshot in range(1, args.dates + 1):
+        if snapshot > 1:
+            date += datetime.timedelta(days=7)
+            versions = [version + 1 if rng.random() < args.changed else version for version in versions]
+        root = os.path.join(args.root, 'snapshot_%d' % snapshot, 'almanac_%d' % date.year)
+        write_snapshot(root, date, args.seed, versions, leagues, affiliates, team_ids)
+        if args.archive:
+            parent, name = os.path.split(root)
+            archive = shutil.make_archive(root, args.archive, parent, name)
+            shutil.rmtree(root)
+            root = archive
+        print root
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = 'http_cache'
+# Megabytes of pages kept before the least recently used are dropped
+CACHE_SIZE = 2048
+# Index changes between commits; the pages themselves are written at once
+COMMIT_EVERY = 100
+
+class CachedResponse:
+    def __init__(self, status, body, etag, last_modified):
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+class HttpCache:
+    # Responses by URL, with their bodies stored once per sha1 under
+    # <directory>/<first two>/<sha1>, so pages that come back unchanged,
+    # or identical under two URLs, take no more room. Error statuses are
+    # kept without a body, so an offline run knows a page is missing.
+    def __init__(self, directory=CACHE_DIR, size=CACHE_SIZE):
+        self.directory = directory
+        self.size = size * 1024 * 1024
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.db.executescript('''
+            create table if not exists responses (
+              url TEXT PRIMARY KEY,
+              status INTEGER,
+              digest TEXT,
+              etag TEXT,
+              last_modified TEXT,
+              used REAL
+            );
+            create index if not exists responses_used on responses (used);
+            create index if not exists responses_digest on responses (digest);
+            create table if not exists bodies (
+              digest TEXT PRIMARY KEY,
+              size INTEGER
+            );
+            ''')
+        self.total = self.db.execute('select coalesce(sum(size), 0) from bodies').fetchone()[0]
+        self.changes = 0
+
+    def body_path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, url):
+        with self.lock:
+            row = self.db.execute('''
+                select status, digest, etag, last_modified
+                from responses
+                where url = ?
+                ''', [url]).fetchone()
+            if row is None:
+                return None
+            status, digest, etag, last_modified = row
+            body = None
+            if digest is not None:
+                try:
+                    with open(self.body_path(digest), 'rb') as f:
+                        body = f.read()
+                except IOError:
+                    # Removed from under the cache
+                    self.db.execute('delete from responses where url = ?', [url])
+                    self.changed()
+                    return None
+            self.touch(url)
+            return CachedResponse(status, body, etag, last_modified)
+
+    def put(self, url, status, body, etag=None, last_modified=None):
+        with self.lock:
+            digest = None
+            if body is not None:
+                digest = hashlib.sha1(body).hexdigest()
+                self.store_body(digest, body)
+            self.db.execute('''
+                insert or replace into responses
+                (url, status, digest, etag, last_modified, used)
+                values
+                (?, ?, ?, ?, ?, ?)
+                ''', [url, status, digest, etag, last_modified, time.time()])
+            self.changed()
+            self.evict()
+
+    def revalidated(self, url):
+        with self.lock:
+            self.touch(url)
+
+    def touch(self, url):
+        self.db.execute('update responses set used = ? where url = ?', [time.time(), url])
+        self.changed()
+
+    def store_body(self, digest, body):
+        if self.db.execute('select 1 from bodies where digest = ?', [digest]).fetchone() is not None:
+            return
+        path = self.body_path(digest)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        # Renamed into place so a crash never leaves half a page
+        with open(path + '.tmp', 'wb') as f:
+            f.write(body)
+        os.rename(path + '.tmp', path)
+        self.db.execute('insert into bodies (digest, size) values (?, ?)', [digest, len(body)])
+        self.total += len(body)
+
+    def evict(self):
+        while self.total > self.size:
+            row = self.db.execute('select url, digest from responses order by used limit 1').fetchone()
+            if row is None:
+                break
+            url, digest = row
+            self.db.execute('delete from responses where url = ?', [url])
+            if digest is not None and self.db.execute('select 1 from responses where digest = ? limit 1', [digest]).fetchone() is None:
+                size = self.db.execute('select size from bodies where digest = ?', [digest]).fetchone()[0]
+                self.db.execute('delete from bodies where digest = ?', [digest])
+                self.total -= size
+                try:
+                    os.remove(self.body_path(digest))
+                except OSError:
+                    pass
+            self.changed()
+
+    def changed(self):
+        self.changes += 1
+        if self.changes % COMMIT_EVERY == 0:
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
@@ -0,0 +1,169 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import sqlite3
+import time
+import traceback
+
+from almanac import almanac_year, open_almanac, player_id as file_player_id
+from bulk_writer import BulkWriter, WRITE_BATCH_SIZE
+from contextlib import closing
+from manifest import Manifest
+from page_index import PageIndex
+from parsing import BACKEND, BACKENDS, parse_player_page, set_backend
+from sections import SECTIONS, get_sections, sections_key
+from watcher import Watcher
+
+import player_updater
+import position_updater
+import scraper
+import statscraper
+
+DATABASE = scraper.DATABASE
+ROOT = scraper.ROOT
+
+# Consumers see each page in this order, so the players row exists before
+# id reuse and position checks run against it
+CONSUMERS = [
+    ('ratings', lambda args, year: scraper.Scraper(get_sections(args.sections.split(',')))),
+    ('id_reuse', lambda args, year: player_updater.Scraper()),
+    ('position', lambda args, year: position_updater.Scraper()),
+    ('season_stats', lambda args, year: statscraper.SeasonStats(year))
+]
+
+_consumers = None
+
+class IngestEngine:
+    def __init__(self, root):
+        self.root = root
+        self.date_id = None
+        self.names = []
+        self.consumers = []
+
+    def register(self, name, consumer):
+        if hasattr(consumer, 'sections'):
+            name += '(' + sections_key(consumer.sections) + ')'
+        self.names.append(name)
+        self.consumers.append(consumer)
+
+    def run(self, workers=1, chunk_size=WRITE_BATCH_SIZE, full=False, player_ids=None):
+        start = time.time()
+        # Nothing carries over from the last run in a watch loop
+        self.date_id = None
+        for consumer in self.consumers:
+            consumer.date_id = None
+            if hasattr(consumer, 'reset_timings'):
+                consumer.reset_timings()
+        with closing(sqlite3.connect(DATABASE)) as db, closing(open_almanac(self.root)) as almanac:
+            writer = BulkWriter(db, chunk_size)
+            for consumer in self.consumers:
+                consumer.writer = writer
+                consumer.almanac = almanac
+            # A page unchanged for one set of consumers may still be new to another
+            manifest = Manifest(db, 'ingest:' + ','.join(self.names))
+            jobs = ((page.player_id, page.read()) for page in manifest.changed_pages(almanac.player_pages(player_ids), full))
+            if workers > 1:
+                pool = multiprocessing.Pool(workers, init_worker, [self.consumers])
+                try:
+                    self.write_pages(db, pool.imap(parse_page, jobs, scraper.POOL_CHUNKSIZE))
+                finally:
+                    pool.terminate()
+                    pool.join()
+            else:
+                init_worker(self.consumers)
+                self.write_pages(db, itertools.imap(parse_page, jobs))
+            print '%d of %d files changed' % (manifest.changes, manifest.seen)
+            if self.date_id is None:
+                # No page changed, but the export still has a date for
+                # what finish() writes
+                date = scraper.read_date(almanac)
+                if date is not None:
+                    self.set_date(db, date)
+            for consumer in self.consumers:
+                if hasattr(consumer, 'finish') and self.date_id is not None:
+                    consumer.finish(db)
+            manifest.save(writer)
+            writer.commit()
+            elapsed = time.time() - start
+            print '%d files in %.1fs (%.1f files/sec, %d workers, %d consumers, %d rows written)' % (
+                manifest.changes, elapsed, manifest.changes / max(elapsed, 0.001), workers, len(self.consumers), writer.count)
+            for consumer in self.consumers:
+                if hasattr(consumer, 'print_timings'):
+                    consumer.print_timings()
+
+    def write_pages(self, db, results):
+        for player_id, date, pages in results:
+            if self.date_id is None:
+                self.set_date(db, date)
+            for consumer, page in zip(self.consumers, pages):
+                consumer.write_page(db, player_id, page)
+
+    def set_date(self, db, date):
+        self.date_id = scraper.get_date_id(db.cursor(), date)
+        for consumer in self.consumers:
+            consumer.date_id = self.date_id
+
+def build_engine(root, args):
+    names = args.consumers.split(',')
+    year = args.year
+    if year is None:
+        year = almanac_year(root)
+    engine = IngestEngine(root)
+    for name, factory in CONSUMERS:
+        if name in names:
+            engine.register(name, factory(args, year))
+    return engine
+
+def watch(args):
+    # Consumers keep their caches between exports; they are only rebuilt
+    # when a new season's almanac folder shows up
+    watcher = Watcher(os.path.dirname(os.path.abspath(args.root)), args.interval, args.quiet)
+    engine = None
+    root = watcher.root
+    player_ids = None
+    full = args.full
+    while True:
+        if root is not None:
+            if engine is None or engine.root != root:
+                engine = build_engine(root, args)
+            try:
+                engine.run(args.workers, args.chunk_size, full, player_ids)
+                full = False
+            except Exception:
+                # Nothing was committed, so the next change retries these pages
+                traceback.print_exc()
+        print 'Watching ' + watcher.news
+        root, paths = watcher.wait()
+        player_ids = set(file_player_id(os.path.basename(path)) for path in paths
+                         if os.path.basename(os.path.dirname(path)) == 'players')
+
+def init_worker(consumers):
+    global _consumers
+    _consumers = consumers
+
+def parse_page(job):
+    player_id, html = job
+    index = PageIndex(parse_player_page(html))
+    pages = [consumer.extract_page(player_id, index) for consumer in _consumers]
+    return player_id, scraper.extract_date(index), pages
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default=ROOT, help='almanac directory, or a .zip or .tar.gz of one')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--parser', default=BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument('--consumers', default=','.join(name for name, factory in CONSUMERS))
+    parser.add_argument('--year', type=int, default=None, help='defaults to the year in the almanac name')
+    parser.add_argument('--chunk-size', type=int, default=WRITE_BATCH_SIZE)
+    parser.add_argument('--full', action='store_true', help='reparse files the manifest says are unchanged')
+    parser.add_argument('--sections', default=','.join(section.name for section in SECTIONS))
+    parser.add_argument('--watch', action='store_true', help='keep running and ingest each new export in the news folder')
+    parser.add_argument('--interval', type=float, default=5, help='seconds between polls in watch mode')
+    parser.add_argument('--quiet', type=float, default=10, help='seconds an export must stop changing before it is read')
+    args = parser.parse_args()
+    set_backend(args.parser)
+    if args.watch:
+        watch(args)
+    else:
+        build_engine(args.root, args).run(args.workers, args.chunk_size, args.full)
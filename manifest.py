@@ -0,0 +1,56 @@
+import hashlib
+import re
+
+# Every export rewrites the report date at the top of each page, so it is
+# left out of the hash or no page would ever look unchanged
+DATE_LINE = re.compile(r'<div style="text-align:center; color:#000000; padding-top:4px;">[^<]*</div>')
+
+def content_hash(html):
+    return hashlib.sha1(DATE_LINE.sub('', html, 1)).hexdigest()
+
+class Manifest:
+    def __init__(self, db, source):
+        self.source = source
+        self.entries = {}
+        self.updates = []
+        self.saved = 0
+        self.seen = 0
+        self.changes = 0
+        cur = db.cursor()
+        cur.execute('''
+            select player_id, size, mtime, hash
+            from player_manifest
+            where source = ?
+            ''', [source])
+        for row in cur.fetchall():
+            self.entries[row[0]] = (row[1], row[2], row[3])
+
+    def changed(self, page):
+        old = self.entries.get(page.player_id)
+        if old is not None and old[0] == page.size and old[1] == page.mtime:
+            return False
+        digest = content_hash(page.read())
+        self.updates.append((self.source, page.player_id, page.size, page.mtime, digest))
+        return old is None or old[2] != digest
+
+    def changed_pages(self, pages, full=False):
+        # Lazy, so pages can be streamed from an archive straight to the parsers
+        for page in pages:
+            self.seen += 1
+            if self.changed(page) or full:
+                self.changes += 1
+                # Updates up to here can be saved once this page is written
+                page.mark = len(self.updates)
+                yield page
+
+    def save(self, writer, mark=None):
+        if mark is None:
+            mark = len(self.updates)
+        for update in self.updates[self.saved:mark]:
+            writer.add('''
+                insert or replace into player_manifest
+                (source, player_id, size, mtime, hash)
+                values
+                (?, ?, ?, ?, ?)
+                ''', update)
+        self.saved = mark
@@ -0,0 +1,59 @@
+from bs4 import NavigableString
+
+# Text that marks a section of a player page; the first string containing
+# each one is kept
+HEADERS = ['BATS:', 'BATTING RATINGS', 'PITCHING RATINGS', 'FIELDING RATINGS', 'POSITION RATINGS',
+           'Career Batting Stats', 'Career Pitching Stats', 'CAREER FIELDING STATS']
+
+# Single nodes extractors look up, by (tag name, attribute, value); the
+# first match in document order is kept, as soup.find would return
+NODES = {
+    'date': ('div', 'style', 'text-align:center; color:#000000; padding-top:4px;'),
+    'title': ('div', 'class', 'reptitle'),
+    'birthday': ('td', 'class', 'wrap'),
+    'personality': ('td', 'width', '172px'),
+    'team_link': ('a', 'class', 'boxlink')
+}
+
+NODES_BY_TAG = {}
+for key, (tag, attr, value) in NODES.items():
+    NODES_BY_TAG.setdefault(tag, []).append((key, attr, value))
+
+def matches(node, attr, value):
+    actual = node.get(attr)
+    if actual is None:
+        return False
+    if isinstance(actual, list):
+        return value in actual
+    return actual == value
+
+class PageIndex:
+    # Built in one walk over the tree, so extractors look sections up
+    # instead of each running its own soup.find over the whole page
+    def __init__(self, soup):
+        self.soup = soup
+        self.headers = {}
+        self.nodes = {}
+        self.data_tables = []
+        missing = list(HEADERS)
+        for node in soup.descendants:
+            if isinstance(node, NavigableString):
+                for header in missing:
+                    if header in node:
+                        self.headers[header] = node
+                        missing = [header for header in HEADERS if header not in self.headers]
+                continue
+            if node.name == 'table' and matches(node, 'class', 'data'):
+                self.data_tables.append(node)
+            for key, attr, value in NODES_BY_TAG.get(node.name, ()):
+                if key not in self.nodes and matches(node, attr, value):
+                    self.nodes[key] = node
+
+    def header(self, text):
+        return self.headers.get(text)
+
+    def table(self, i):
+        return self.data_tables[i]
+
+    def node(self, key):
+        return self.nodes.get(key)
@@ -0,0 +1,28 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Everything the player page extractors read (report title, date line,
+# section headers and the table.data blocks) lives under a div or a table,
+# so the strained backend never builds the head, scripts or loose markup
+PLAYER_PAGE = SoupStrainer(['div', 'table'])
+
+BACKENDS = {
+    'html.parser': ('html.parser', None),
+    'lxml': ('lxml', None),
+    'lxml-strained': ('lxml', PLAYER_PAGE)
+}
+
+BACKEND = 'lxml-strained'
+
+def set_backend(backend):
+    global BACKEND
+    if backend not in BACKENDS:
+        raise ValueError('Unknown parser backend: ' + backend)
+    BACKEND = backend
+
+def parse(html, backend=None):
+    features, parse_only = BACKENDS[backend or BACKEND]
+    return BeautifulSoup(html, features)
+
+def parse_player_page(html, backend=None):
+    features, parse_only = BACKENDS[backend or BACKEND]
+    return BeautifulSoup(html, features, parse_only=parse_only)
@@ -0,0 +1,180 @@
+import itertools
+import multiprocessing
+import Queue
+import sys
+import threading
+import time
+
+# Default capacity of the queue between the reader and the parsers, and
+# of the one between the parsers and the writer
+READ_AHEAD = 64
+WRITE_QUEUE = 64
+# How often a blocked stage looks up to see if the run was stopped
+POLL = 0.1
+
+DONE = object()
+
+class Stage:
+    # A bounded queue into one stage. A full queue blocks whoever feeds
+    # it, which is the backpressure: a slow writer holds back parsing, and
+    # slow parsing holds back reading, instead of pages piling up in memory.
+    def __init__(self, name, capacity, stopped):
+        self.name = name
+        self.capacity = capacity
+        self.queue = Queue.Queue(capacity)
+        self.stopped = stopped
+        self.samples = 0
+        self.total_depth = 0
+        self.max_depth = 0
+        # Time the stage before was held back by a full queue, and time
+        # this stage sat waiting on an empty one
+        self.full_time = 0.0
+        self.empty_time = 0.0
+
+    def put(self, item):
+        start = time.time()
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, True, POLL)
+                break
+            except Queue.Full:
+                pass
+        self.full_time += time.time() - start
+
+    def get(self):
+        depth = self.queue.qsize()
+        self.samples += 1
+        self.total_depth += depth
+        self.max_depth = max(self.max_depth, depth)
+        start = time.time()
+        item = DONE
+        while not self.stopped.is_set():
+            try:
+                item = self.queue.get(True, POLL)
+                break
+            except Queue.Empty:
+                pass
+        self.empty_time += time.time() - start
+        return item
+
+    def average_depth(self):
+        return float(self.total_depth) / max(self.samples, 1)
+
+class Pipeline:
+    # Reads, parses and writes at the same time. A reader thread reads
+    # pages ahead into the read stage, the pool parses them, and a
+    # collector thread hands the results, in order, to the write stage,
+    # which is drained by whoever iterates results() and owns the
+    # connection. Parse holds a token per page inside the pool, since the
+    # pool would otherwise take every job it is offered. With one worker
+    # the collector parses, which still overlaps the reading and writing.
+    def __init__(self, pages, job, function, workers=1, chunksize=1, read_ahead=READ_AHEAD, write_queue=WRITE_QUEUE):
+        self.pages = pages
+        self.job = job
+        self.function = function
+        self.workers = workers
+        self.chunksize = chunksize
+        self.pool = None
+        self.stopped = threading.Event()
+        self.read = Stage('read', read_ahead, self.stopped)
+        # Every worker busy with a chunk and one more waiting, or the single
+        # page the collector is parsing
+        parse_capacity = 1
+        if workers > 1:
+            parse_capacity = workers * chunksize * 2
+        self.parse = Stage('parse', parse_capacity, self.stopped)
+        self.write = Stage('write', write_queue, self.stopped)
+        self.error = None
+        self.threads = []
+
+    def start(self):
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers)
+        for target in [self.read_pages, self.collect]:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def results(self):
+        self.start()
+        while True:
+            result = self.write.get()
+            if result is DONE:
+                break
+            yield result
+        if self.error is not None:
+            raise self.error[0], self.error[1], self.error[2]
+
+    def close(self):
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+
+    def read_pages(self):
+        try:
+            for page in self.pages:
+                if self.stopped.is_set():
+                    break
+                self.read.put(self.job(page))
+        except Exception:
+            self.error = sys.exc_info()
+        self.read.put(DONE)
+
+    def jobs(self):
+        # Runs in the pool's task handler thread
+        while True:
+            job = self.read.get()
+            if job is DONE:
+                return
+            self.parse.put(None)
+            yield job
+
+    def chunks(self):
+        chunk = []
+        for job in self.jobs():
+            chunk.append(job)
+            if len(chunk) == self.chunksize:
+                yield self.function, chunk
+                chunk = []
+        if len(chunk) > 0:
+            yield self.function, chunk
+
+    def collect(self):
+        try:
+            if self.pool is None:
+                results = itertools.imap(self.function, self.jobs())
+                for result in results:
+                    self.parse.get()
+                    self.write.put(result)
+            else:
+                # Chunked here rather than by imap, which only takes a
+                # timeout without chunks
+                chunks = self.pool.imap(parse_chunk, self.chunks())
+                while not self.stopped.is_set():
+                    try:
+                        results = chunks.next(POLL)
+                    except multiprocessing.TimeoutError:
+                        continue
+                    except StopIteration:
+                        break
+                    for result in results:
+                        self.parse.get()
+                        self.write.put(result)
+        except Exception:
+            if self.error is None:
+                self.error = sys.exc_info()
+        self.write.put(DONE)
+
+    def print_stats(self):
+        print '%-6s %8s %10s %10s %10s %10s' % ('queue', 'capacity', 'avg depth', 'max depth', 'full', 'empty')
+        for stage in [self.read, self.parse, self.write]:
+            print '%-6s %8d %10.1f %10d %9.2fs %9.2fs' % (
+                stage.name, stage.capacity, stage.average_depth(), stage.max_depth, stage.full_time, stage.empty_time)
+
+def parse_chunk(chunk):
+    function, jobs = chunk
+    return [function(job) for job in jobs]
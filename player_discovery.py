@@ -0,0 +1,72 @@
+import posixpath
+import re
+
+from parsing import parse
+
+# Index pages the crawl starts from, per league. Any page under leagues/
+# or teams/ they link to is read in turn, so team and roster pages are
+# found without naming them here.
+START_PAGES = [
+    'leagues/league_%d_home.html',
+    'leagues/league_%d_waiver_wire_block.html',
+    'leagues/league_%d_upcoming_free_agents_report_0.html',
+    'leagues/league_%d_upcoming_free_agents_report_1.html'
+]
+INDEX_DIRECTORIES = set(['leagues', 'teams'])
+# Most index pages read in one crawl, however many the site links to
+MAX_PAGES = 5000
+PLAYER_PAGE = re.compile(r'^players/player_(\d+)\.html$')
+
+def linked_pages(name, html):
+    # The site pages a page links to, as names relative to the site root
+    pages = []
+    for link in parse(html).find_all('a'):
+        href = link.get('href')
+        if href is None or '://' in href or href.startswith('#'):
+            continue
+        href = href.split('#')[0].split('?')[0]
+        pages.append(posixpath.normpath(posixpath.join(posixpath.dirname(name), href)))
+    return pages
+
+def discover(db, fetcher, leagues):
+    # Reads the index pages a level of links at a time and adds every
+    # player they link to to known_players
+    level = [page % league for league in leagues for page in START_PAGES]
+    seen = set(level)
+    found = {}
+    while len(level) > 0:
+        next_level = []
+        for name, html in fetcher.fetch_all((name, name) for name in level):
+            if html is None:
+                continue
+            for page in linked_pages(name, html):
+                match = PLAYER_PAGE.match(page)
+                if match is not None:
+                    found.setdefault(int(match.group(1)), name)
+                elif page.split('/')[0] in INDEX_DIRECTORIES and page.endswith('.html') and page not in seen \
+                        and len(seen) < MAX_PAGES:
+                    seen.add(page)
+                    next_level.append(page)
+        level = next_level
+    cur = db.cursor()
+    cur.executemany('''
+        insert or ignore into known_players
+        (player_id, found_on)
+        values
+        (?, ?)
+        ''', sorted(found.items()))
+    print '%d index pages read, %d players linked, %d new' % (len(seen), len(found), cur.rowcount)
+
+def player_ids(db, probe=0):
+    # Every player found by a crawl or already in the database, in order,
+    # and with probe every id below it as well
+    cur = db.cursor()
+    cur.execute('''
+        select player_id from known_players
+        union select id from players
+        union select player_id from season_batting_stats
+        union select player_id from season_pitching_stats
+        ''')
+    ids = set(row[0] for row in cur.fetchall())
+    ids.update(range(probe))
+    return sorted(ids)
@@ -1,9 +1,13 @@
-import os
+import argparse
 import re
 import sqlite3
 
-from bs4 import BeautifulSoup
+from almanac import open_almanac
+from bulk_writer import BulkWriter, load_player_ids
 from contextlib import closing
+from fast_index import TAG, unescape
+from page_index import PageIndex
+from parsing import parse_player_page
 
 DATABASE = 'wbh.db'
 ROOT = '/Users/davidwen/Library/Application Support/Out of the Park Developments/OOTP Baseball 14/saved_games/WBH.lg/news/almanac_2035'
@@ -15,9 +19,36 @@ RATINGS = {
     'Very Low': 1
 }
 DATE_ID = 17
+# Everything kept about a player by date, from before an id was reused
+HISTORY_TABLES = ['batting_ratings', 'pitching_ratings', 'fielding_ratings', 'run_ratings', 'position_ratings', 'pitch_ratings',
+                  'player_teams']
+TITLE = re.compile(r'<div[^>]*class="reptitle"[^>]*>(.*?)</div>', re.I | re.S)
+
+INSERT_PLAYER = '''
+    insert or replace into players
+    (id, name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+def player_name(title):
+    return title[title.find(' ') + 1:title.find('#') - 1].strip()
+
+def title_name(html):
+    # The name from the report title, read off the source without parsing
+    # the page. None if there is no title there to read.
+    match = TITLE.search(html)
+    if match is None:
+        return None
+    try:
+        return player_name(unescape(TAG.sub('', match.group(1).decode('utf-8'))))
+    except UnicodeDecodeError:
+        return None
 
 class Scraper:
     def __init__(self):
+        self.date_id = DATE_ID
+        self.writer = None
         self.names = {}
         with closing(sqlite3.connect(DATABASE)) as db:
             self.populate_names(db)
@@ -28,93 +59,127 @@ class Scraper:
         for row in cur.fetchall():
             self.names[row[0]] = row[1]
 
+    def rated_player_ids(self, db):
+        cursor = db.cursor()
+        cursor.execute('''
+            select player_id from batting_ratings where date_id = ?
+            union
+            select player_id from pitching_ratings where date_id = ?
+            ''', [self.date_id, self.date_id])
+        return set(row[0] for row in cursor.fetchall())
+
     def scrape(self):
         with closing(sqlite3.connect(DATABASE)) as db:
-            player_ids = []
-            cursor = db.cursor()
-            cursor.execute('''
-                select player_id from batting_ratings where date_id = %d
-                ''' % (DATE_ID))
-            for row in cursor.fetchall():
-                player_ids.append(row[0])
-            cursor.execute('''
-                select player_id from pitching_ratings where date_id = %d
-                ''', (DATE_ID))
-            for row in cursor.fetchall():
-                player_ids.append(row[0])
-            for player_id in player_ids:
-                filename = ROOT + '/players/player_%d.html' % player_id
-                self.read_player_file(db, player_id, filename)
-            db.commit()
-            
-    def read_player_file(self, db, player_id, filename):
-        with open(filename, 'rb') as f:
-            soup = BeautifulSoup(f.read())
-            name = soup.find('div', class_='reptitle').text
-            name = name[name.find(' ') + 1:name.find('#') - 1].strip()
-
-            if self.names[player_id] != name:
-                print str(player_id) + ' ' + name
-                data_line = soup.find(text=re.compile('BATS:'))
-                position = data_line.split(' ')[0]
-                if position == 'P':
-                    other_ratings_table = soup.find_all('table', class_='data')[3]
-                    other_ratings_rows = other_ratings_table.find_all('tr')
-                    role = other_ratings_rows[3].find_all('td')[1].text
-                    if role == 'Starter':
-                        position = 'SP'
-                    else:
-                        position = 'MR'
-
-                birthday = soup.find('td', class_='wrap').text
-                birthday = self.format_date(birthday)
-
-                personality = soup.find('td', width='172px')
-                personality_td = personality.find_all('td')
-                leadership = RATINGS[personality_td[1].text]
-                loyalty = RATINGS[personality_td[3].text]
-                desire_for_win = RATINGS[personality_td[5].text]
-                greed = RATINGS[personality_td[7].text]
-                intelligence = RATINGS[personality_td[9].text]
-                work_ethic = RATINGS[personality_td[11].text]
-
-                bats = data_line[data_line.find('BATS:') + 6: data_line.find('BATS:') + 7]
-                throws = data_line[data_line.find('THROWS:') + 8: data_line.find('THROWS:') + 9]
-
-                cur = db.cursor()
-                cur.execute('''
-                    insert or replace into players
-                    (id, name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position)
-                    values
-                    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (player_id, name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position))
-                cur.execute('''
-                    delete from batting_ratings where player_id = %d and date_id < %d
-                    ''' % (player_id, DATE_ID))
-                cur.execute('''
-                    delete from pitching_ratings where player_id = %d and date_id < %d
-                    ''' % (player_id, DATE_ID))
-                cur.execute('''
-                    delete from fielding_ratings where player_id = %d and date_id < %d
-                    ''' % (player_id, DATE_ID))
-                cur.execute('''
-                    delete from run_ratings where player_id = %d and date_id < %d
-                    ''' % (player_id, DATE_ID))
-                cur.execute('''
-                    delete from position_ratings where player_id = %d and date_id < %d
-                    ''' % (player_id, DATE_ID))
-                cur.execute('''
-                    delete from player_teams where player_id = %d and date_id < %d
-                    ''' % (player_id, DATE_ID))
-                cur.execute('''
-                    insert or ignore into player_teams (player_id, team_id, date_id) values (%d, 0, %d)
-                    ''' % (player_id, DATE_ID))
-                db.commit()
+            player_ids = self.rated_player_ids(db)
+            self.writer = BulkWriter(db)
+            with closing(open_almanac(ROOT)) as almanac:
+                for page in almanac.player_pages():
+                    if page.player_id in player_ids:
+                        self.read_player_page(db, page.player_id, page.read())
+            self.writer.commit()
+
+    def bulk_scrape(self):
+        # Tells reused ids apart by the name in the page title alone, so
+        # only their pages are parsed, then clears the history of all of
+        # them with one statement a table in a single transaction
+        with closing(sqlite3.connect(DATABASE)) as db:
+            player_ids = self.rated_player_ids(db)
+            players = []
+            with closing(open_almanac(ROOT)) as almanac:
+                for page in almanac.player_pages():
+                    if page.player_id not in player_ids:
+                        continue
+                    html = page.read()
+                    name = title_name(html)
+                    if name is not None and self.names.get(page.player_id, name) == name:
+                        continue
+                    player = self.extract_page(page.player_id, PageIndex(parse_player_page(html)))
+                    if player is not None:
+                        print str(page.player_id) + ' ' + player[0]
+                        players.append([page.player_id] + list(player))
+            self.purge(db, players)
+
+    def purge(self, db, players):
+        cur = db.cursor()
+        load_player_ids(cur, 'reused_players', [player[0] for player in players])
+        cur.executemany(INSERT_PLAYER, players)
+        for table in HISTORY_TABLES:
+            cur.execute('''
+                delete from %s
+                where date_id < ? and player_id in (select player_id from reused_players)
+                ''' % table, [self.date_id])
+        cur.execute('''
+            insert or ignore into player_teams (player_id, team_id, date_id)
+            select player_id, 0, ? from reused_players
+            ''', [self.date_id])
+        db.commit()
+        for player in players:
+            self.names[player[0]] = player[1]
+        print '%d reused ids' % len(players)
+
+    def read_player_page(self, db, player_id, html):
+        index = PageIndex(parse_player_page(html))
+        self.write_page(db, player_id, self.extract_page(player_id, index))
+
+    def extract_page(self, player_id, index):
+        name = player_name(index.node('title').text)
+        if self.names.get(player_id, name) == name:
+            return None
+
+        data_line = unicode(index.header('BATS:'))
+        position = data_line.split(' ')[0]
+        if position == 'P':
+            other_ratings_table = index.table(3)
+            other_ratings_rows = other_ratings_table.find_all('tr')
+            role = other_ratings_rows[3].find_all('td')[1].text
+            if role == 'Starter':
+                position = 'SP'
+            else:
+                position = 'MR'
+
+        birthday = index.node('birthday').text
+        birthday = self.format_date(birthday)
+
+        personality = index.node('personality')
+        personality_td = personality.find_all('td')
+        leadership = RATINGS[personality_td[1].text]
+        loyalty = RATINGS[personality_td[3].text]
+        desire_for_win = RATINGS[personality_td[5].text]
+        greed = RATINGS[personality_td[7].text]
+        intelligence = RATINGS[personality_td[9].text]
+        work_ethic = RATINGS[personality_td[11].text]
+
+        bats = data_line[data_line.find('BATS:') + 6: data_line.find('BATS:') + 7]
+        throws = data_line[data_line.find('THROWS:') + 8: data_line.find('THROWS:') + 9]
+        return (name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position)
+
+    def write_page(self, db, player_id, player):
+        if player is None:
+            return
+        name = player[0]
+        print str(player_id) + ' ' + name
+        params = [player_id]
+        params.extend(player)
+        self.writer.execute(INSERT_PLAYER, params)
+        for table in HISTORY_TABLES:
+            self.writer.execute('''
+                delete from %s where player_id = ? and date_id < ?
+                ''' % table, [player_id, self.date_id])
+        self.writer.execute('''
+            insert or ignore into player_teams (player_id, team_id, date_id) values (?, 0, ?)
+            ''', [player_id, self.date_id])
+        self.names[player_id] = name
 
     def format_date(self, date):
         date_parts = date.split('/')
         return date_parts[2] + '-' + date_parts[0] + '-' + date_parts[1]
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bulk', action='store_true', help='find reused ids from the page titles and clear them all at once')
+    args = parser.parse_args()
     scraper = Scraper()
-    scraper.scrape()
\ No newline at end of file
+    if args.bulk:
+        scraper.bulk_scrape()
+    else:
+        scraper.scrape()
\ No newline at end of file
@@ -1,15 +1,17 @@
-import os
-import re
 import sqlite3
 
-from bs4 import BeautifulSoup
+from almanac import open_almanac
+from bulk_writer import BulkWriter
 from contextlib import closing
+from page_index import PageIndex
+from parsing import parse_player_page
 
 DATABASE = 'wbh.db'
 ROOT = '/Users/davidwen/Library/Application Support/Out of the Park Developments/OOTP Baseball 14/saved_games/WBH.lg/news/almanac_2034'
 
 class Scraper:
     def __init__(self):
+        self.writer = None
         self.positions = {}
         with closing(sqlite3.connect(DATABASE)) as db:
             self.populate_positions(db)
@@ -22,35 +24,39 @@ class Scraper:
 
     def scrape(self):
         with closing(sqlite3.connect(DATABASE)) as db:
-            for dirname, dirnames, filenames in os.walk(ROOT + '/players'):
-                for filename in filenames:
-                    if filename[0] == '.':
-                        continue
-                    player_id = int(filename[len('player_'):filename.find('.')])
-                    self.read_player_file(db, player_id, os.path.join(dirname, filename))
-            db.commit()
+            self.writer = BulkWriter(db)
+            with closing(open_almanac(ROOT)) as almanac:
+                for page in almanac.player_pages():
+                    self.read_player_page(db, page.player_id, page.read())
+            self.writer.commit()
             
-    def read_player_file(self, db, player_id, filename):
-        with open(filename, 'rb') as f:
-            soup = BeautifulSoup(f.read())
-            data_line = soup.find(text=re.compile('BATS:'))
-            position = data_line.split(' ')[0]
-            if position == 'P':
-                other_ratings_table = soup.find_all('table', class_='data')[3]
-                other_ratings_rows = other_ratings_table.find_all('tr')
-                role = other_ratings_rows[3].find_all('td')[1].text
-                if role == 'Starter':
-                    position = 'SP'
-                else:
-                    position = 'MR'
-            if self.positions[player_id] != position:
-                print str(player_id) + ': ' + self.positions[player_id] + ' -> ' + position
-                cur = db.cursor()
-                cur.execute('''
-                    update players
-                    set position = ?
-                    where id = ?
-                    ''', [position, player_id])
+    def read_player_page(self, db, player_id, html):
+        index = PageIndex(parse_player_page(html))
+        self.write_page(db, player_id, self.extract_page(player_id, index))
+
+    def extract_page(self, player_id, index):
+        data_line = index.header('BATS:')
+        position = unicode(data_line.split(' ')[0])
+        if position == 'P':
+            other_ratings_table = index.table(3)
+            other_ratings_rows = other_ratings_table.find_all('tr')
+            role = other_ratings_rows[3].find_all('td')[1].text
+            if role == 'Starter':
+                position = 'SP'
+            else:
+                position = 'MR'
+        return position
+
+    def write_page(self, db, player_id, position):
+        old_position = self.positions.get(player_id)
+        if old_position != position:
+            print str(player_id) + ': ' + str(old_position) + ' -> ' + position
+            self.writer.execute('''
+                update players
+                set position = ?
+                where id = ?
+                ''', [position, player_id])
+            self.positions[player_id] = position
 
 if __name__ == '__main__':
     scraper = Scraper()
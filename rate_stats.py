@@ -0,0 +1,92 @@
+import argparse
+import numpy
+import sqlite3
+
+from contextlib import closing
+
+DATABASE = 'wbh.db'
+
+BATTING_TABLES = ['batting_stats', 'season_batting_stats']
+PITCHING_TABLES = ['pitching_stats', 'season_pitching_stats']
+
+BATTING_COUNTS = ['ab', 'h', 'double', 'triple', 'hr', 'bb', 'hp', 'sf', 'k']
+BATTING_RATES = ['avg', 'obp', 'slg', 'ops', 'babip', 'krate', 'bbrate']
+PITCHING_COUNTS = ['ip', 'ha', 'er', 'bb', 'k']
+PITCHING_RATES = ['era', 'whip', 'k9', 'bb9', 'kbb']
+
+def round_half_up(values, places):
+    # As Python's round, halves away from zero, where numpy's go to even.
+    # Close to a half the multiply can land on either side of it, so those
+    # few are left to round itself, which goes by the exact value.
+    scale = 10.0 ** places
+    scaled = numpy.abs(values) * scale
+    rounded = numpy.sign(values) * numpy.floor(scaled + 0.5) / scale
+    for i in numpy.flatnonzero(numpy.abs(scaled - numpy.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(values[i]), places)
+    return rounded
+
+def batting_rates(s):
+    # compile_batting_stats over whole columns at once
+    pa = s['ab'] + s['bb'] + s['hp'] + s['sf']
+    rates = {}
+    rates['avg'] = round_half_up(s['h'] / s['ab'], 3)
+    rates['obp'] = round_half_up((s['h'] + s['bb'] + s['hp']) / pa, 3)
+    rates['slg'] = round_half_up((s['h'] + s['double'] + 2 * s['triple'] + 3 * s['hr']) / s['ab'], 3)
+    rates['ops'] = round_half_up(rates['obp'] + rates['slg'], 3)
+    balls_in_play = s['ab'] - s['k'] - s['hr'] + s['sf']
+    rates['babip'] = numpy.where(balls_in_play > 0, round_half_up((s['h'] - s['hr']) / balls_in_play, 3), 0)
+    rates['krate'] = round_half_up(s['k'] / pa, 2)
+    rates['bbrate'] = round_half_up(s['bb'] / pa, 2)
+    return rates
+
+def pitching_rates(s):
+    # compile_pitching_stats over whole columns at once. Innings are kept
+    # as whole innings and thirds, 45.2 for 45 2/3, and the thirds count
+    # as .2333 and .4666 of an inning.
+    tenths = numpy.rint(s['ip'] * 10).astype(int)
+    thirds = tenths % 10
+    innings = tenths // 10 + thirds / 10.0 + numpy.choose(numpy.clip(thirds, 0, 2), [0, 0.2333, 0.4666])
+    rates = {}
+    rates['era'] = round_half_up(s['er'] * 9.0 / innings, 2)
+    rates['whip'] = round_half_up((s['ha'] + s['bb']) / innings, 2)
+    rates['k9'] = round_half_up(s['k'] * 9.0 / innings, 2)
+    rates['bb9'] = round_half_up(s['bb'] * 9.0 / innings, 2)
+    rates['kbb'] = numpy.where(s['bb'] > 0, round_half_up(s['k'] / s['bb'], 2), 0)
+    return rates
+
+def recompute(db, table, counts, rates, compute, dry_run=False, where='', params=[]):
+    # Loads a table's counting stats and rates as columns, works every rate
+    # out again and writes back only the rows whose rates came out different.
+    # where narrows it to some of the rows.
+    columns = counts + rates
+    rows = db.execute('select rowid, %s from %s %s' % (', '.join(columns), table, where), params).fetchall()
+    if len(rows) == 0:
+        print '%s: no rows' % table
+        return 0
+    data = numpy.array(rows, dtype=float)
+    rowids = data[:, 0].astype(int)
+    stats = dict((column, data[:, i + 1]) for i, column in enumerate(columns))
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        new_rates = compute(stats)
+    new = numpy.column_stack([new_rates[rate] for rate in rates])
+    old = numpy.column_stack([stats[rate] for rate in rates])
+    changed = numpy.flatnonzero(numpy.any(new != old, axis=1))
+    print '%s: %d of %d rows changed' % (table, len(changed), len(rows))
+    if not dry_run and len(changed) > 0:
+        updates = [values + [rowid] for values, rowid in zip(new[changed].tolist(), rowids[changed].tolist())]
+        db.executemany('update %s set %s where rowid = ?' % (table, ', '.join(rate + ' = ?' for rate in rates)), updates)
+    return len(changed)
+
+def recompute_all(db, dry_run=False):
+    for table in BATTING_TABLES:
+        recompute(db, table, BATTING_COUNTS, BATTING_RATES, batting_rates, dry_run)
+    for table in PITCHING_TABLES:
+        recompute(db, table, PITCHING_COUNTS, PITCHING_RATES, pitching_rates, dry_run)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Work out the rate stats again from the counting stats')
+    parser.add_argument('--dry-run', action='store_true', help='count the rows that would change without writing them')
+    args = parser.parse_args()
+    with closing(sqlite3.connect(DATABASE)) as db:
+        recompute_all(db, args.dry_run)
+        db.commit()
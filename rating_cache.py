@@ -0,0 +1,54 @@
+from array import array
+
+# Ratings, team ids and '-' (None) all have to fit in a signed short
+MISSING = -1
+
+PITCHES = ['fastball', 'changeup', 'curveball', 'slider', 'sinker', 'splitter',
+           'cutter', 'forkball', 'circle_change', 'screwball', 'knuckle_curve', 'knuckleball']
+PITCH_COLUMNS = PITCHES + ['pot_' + pitch for pitch in PITCHES]
+
+def encode(ratings):
+    if None in ratings:
+        ratings = [MISSING if rating is None else rating for rating in ratings]
+    return array('h', ratings)
+
+def pitch_row(ratings):
+    return [ratings.get(column) for column in PITCH_COLUMNS]
+
+class RatingCache:
+    # OOTP numbers players densely from 0, so a player's row starts at
+    # player_id * width and no per-player objects are kept at all
+    def __init__(self, width):
+        self.width = width
+        self.values = array('h')
+        self.present = bytearray()
+
+    def __len__(self):
+        return sum(self.present)
+
+    def __contains__(self, player_id):
+        return player_id < len(self.present) and self.present[player_id] == 1
+
+    def grow(self, player_id):
+        missing = player_id + 1 - len(self.present)
+        if missing > 0:
+            self.present.extend(bytearray(missing))
+            self.values.extend(array('h', [MISSING]) * (missing * self.width))
+
+    def get(self, player_id):
+        if player_id not in self:
+            return None
+        start = player_id * self.width
+        return [None if rating == MISSING else rating for rating in self.values[start:start + self.width]]
+
+    def set(self, player_id, ratings):
+        self.grow(player_id)
+        start = player_id * self.width
+        self.values[start:start + self.width] = encode(ratings)
+        self.present[player_id] = 1
+
+    def changed(self, player_id, ratings):
+        if player_id >= len(self.present) or self.present[player_id] == 0:
+            return True
+        start = player_id * self.width
+        return self.values[start:start + self.width] != encode(ratings)
@@ -135,6 +135,11 @@ CREATE TABLE IF NOT EXISTS upcoming_fa(
     player_id INTEGER,
     PRIMARY KEY (player_id));
 
+CREATE TABLE IF NOT EXISTS upcoming_fa_history(
+    player_id INTEGER,
+    date_id INTEGER,
+    PRIMARY KEY (player_id, date_id));
+
 CREATE TABLE IF NOT EXISTS batting_stats(
     player_id INTEGER,
     name TEXT,
@@ -285,4 +290,291 @@ CREATE TABLE IF NOT EXISTS pitch_ratings(
     pot_screwball INTEGER,
     pot_knuckle_curve INTEGER,
     pot_knuckleball INTEGER,
-    PRIMARY KEY (player_id, date_id));
\ No newline at end of file
+    PRIMARY KEY (player_id, date_id));
+
+CREATE TABLE IF NOT EXISTS player_manifest(
+    source TEXT,
+    player_id INTEGER,
+    size INTEGER,
+    mtime REAL,
+    hash TEXT,
+    PRIMARY KEY (source, player_id));
+
+CREATE TABLE IF NOT EXISTS scrape_checkpoints(
+    run_id TEXT PRIMARY KEY,
+    phase TEXT,
+    player_id INTEGER,
+    position INTEGER);
+
+CREATE TABLE IF NOT EXISTS known_players(
+    player_id INTEGER PRIMARY KEY,
+    found_on TEXT);
+
+
+-- Each player's most recent row from the matching history table, kept
+-- current by the triggers below so readers never need the anti-join
+CREATE TABLE IF NOT EXISTS latest_batting_ratings(
+    player_id INTEGER,
+    date_id INTEGER,
+    contact INTEGER,
+    gap INTEGER,
+    power INTEGER,
+    eye INTEGER,
+    avoid_k INTEGER,
+    contact_r INTEGER,
+    gap_r INTEGER,
+    power_r INTEGER,
+    eye_r INTEGER,
+    avoid_k_r INTEGER,
+    contact_l INTEGER,
+    gap_l INTEGER,
+    power_l INTEGER,
+    eye_l INTEGER,
+    avoid_k_l INTEGER,
+    pot_contact INTEGER,
+    pot_gap INTEGER,
+    pot_power INTEGER,
+    pot_eye INTEGER,
+    pot_avoid_k INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TABLE IF NOT EXISTS latest_pitching_ratings(
+    player_id INTEGER,
+    date_id INTEGER,
+    stuff INTEGER,
+    movement INTEGER,
+    control INTEGER,
+    stuff_l INTEGER,
+    movement_l INTEGER,
+    control_l INTEGER,
+    stuff_r INTEGER,
+    movement_r INTEGER,
+    control_r INTEGER,
+    pot_stuff INTEGER,
+    pot_movement INTEGER,
+    pot_control INTEGER,
+    stamina INTEGER,
+    velocity INTEGER,
+    hold INTEGER,
+    groundball INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TABLE IF NOT EXISTS latest_fielding_ratings(
+    player_id INTEGER,
+    date_id INTEGER,
+    catcher_arm INTEGER,
+    catcher_ability INTEGER,
+    infield_range INTEGER,
+    infield_errors INTEGER,
+    infield_arm INTEGER,
+    infield_turn_dp INTEGER,
+    outfield_range INTEGER,
+    outfield_errors INTEGER,
+    outfield_arm INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TABLE IF NOT EXISTS latest_position_ratings(
+    player_id INTEGER,
+    date_id INTEGER,
+    p INTEGER,
+    c INTEGER,
+    first_b INTEGER,
+    second_b INTEGER,
+    third_b INTEGER,
+    ss INTEGER,
+    lf INTEGER,
+    cf INTEGER,
+    rf INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TABLE IF NOT EXISTS latest_run_ratings(
+    player_id INTEGER,
+    date_id INTEGER,
+    speed INTEGER,
+    steal INTEGER,
+    baserunning INTEGER,
+    sac_bunt INTEGER,
+    bunt_for_hit INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TABLE IF NOT EXISTS latest_player_teams(
+    player_id INTEGER,
+    date_id INTEGER,
+    team_id INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TABLE IF NOT EXISTS latest_pitch_ratings(
+    player_id INTEGER,
+    date_id INTEGER,
+    fastball INTEGER,
+    changeup INTEGER,
+    curveball INTEGER,
+    slider INTEGER,
+    sinker INTEGER,
+    splitter INTEGER,
+    cutter INTEGER,
+    forkball INTEGER,
+    circle_change INTEGER,
+    screwball INTEGER,
+    knuckle_curve INTEGER,
+    knuckleball INTEGER,
+    pot_fastball INTEGER,
+    pot_changeup INTEGER,
+    pot_curveball INTEGER,
+    pot_slider INTEGER,
+    pot_sinker INTEGER,
+    pot_splitter INTEGER,
+    pot_cutter INTEGER,
+    pot_forkball INTEGER,
+    pot_circle_change INTEGER,
+    pot_screwball INTEGER,
+    pot_knuckle_curve INTEGER,
+    pot_knuckleball INTEGER,
+    PRIMARY KEY (player_id));
+
+CREATE TRIGGER IF NOT EXISTS batting_ratings_latest_insert
+AFTER INSERT ON batting_ratings
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_batting_ratings WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_batting_ratings
+    SELECT * FROM batting_ratings WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS batting_ratings_latest_delete
+AFTER DELETE ON batting_ratings
+WHEN OLD.date_id = (SELECT date_id FROM latest_batting_ratings WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_batting_ratings WHERE player_id = OLD.player_id;
+    INSERT INTO latest_batting_ratings
+    SELECT * FROM batting_ratings WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_batting_ratings
+SELECT * FROM batting_ratings r
+WHERE r.date_id = (SELECT max(date_id) FROM batting_ratings WHERE player_id = r.player_id);
+
+CREATE TRIGGER IF NOT EXISTS pitching_ratings_latest_insert
+AFTER INSERT ON pitching_ratings
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_pitching_ratings WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_pitching_ratings
+    SELECT * FROM pitching_ratings WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS pitching_ratings_latest_delete
+AFTER DELETE ON pitching_ratings
+WHEN OLD.date_id = (SELECT date_id FROM latest_pitching_ratings WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_pitching_ratings WHERE player_id = OLD.player_id;
+    INSERT INTO latest_pitching_ratings
+    SELECT * FROM pitching_ratings WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_pitching_ratings
+SELECT * FROM pitching_ratings r
+WHERE r.date_id = (SELECT max(date_id) FROM pitching_ratings WHERE player_id = r.player_id);
+
+CREATE TRIGGER IF NOT EXISTS fielding_ratings_latest_insert
+AFTER INSERT ON fielding_ratings
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_fielding_ratings WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_fielding_ratings
+    SELECT * FROM fielding_ratings WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS fielding_ratings_latest_delete
+AFTER DELETE ON fielding_ratings
+WHEN OLD.date_id = (SELECT date_id FROM latest_fielding_ratings WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_fielding_ratings WHERE player_id = OLD.player_id;
+    INSERT INTO latest_fielding_ratings
+    SELECT * FROM fielding_ratings WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_fielding_ratings
+SELECT * FROM fielding_ratings r
+WHERE r.date_id = (SELECT max(date_id) FROM fielding_ratings WHERE player_id = r.player_id);
+
+CREATE TRIGGER IF NOT EXISTS position_ratings_latest_insert
+AFTER INSERT ON position_ratings
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_position_ratings WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_position_ratings
+    SELECT * FROM position_ratings WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS position_ratings_latest_delete
+AFTER DELETE ON position_ratings
+WHEN OLD.date_id = (SELECT date_id FROM latest_position_ratings WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_position_ratings WHERE player_id = OLD.player_id;
+    INSERT INTO latest_position_ratings
+    SELECT * FROM position_ratings WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_position_ratings
+SELECT * FROM position_ratings r
+WHERE r.date_id = (SELECT max(date_id) FROM position_ratings WHERE player_id = r.player_id);
+
+CREATE TRIGGER IF NOT EXISTS run_ratings_latest_insert
+AFTER INSERT ON run_ratings
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_run_ratings WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_run_ratings
+    SELECT * FROM run_ratings WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS run_ratings_latest_delete
+AFTER DELETE ON run_ratings
+WHEN OLD.date_id = (SELECT date_id FROM latest_run_ratings WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_run_ratings WHERE player_id = OLD.player_id;
+    INSERT INTO latest_run_ratings
+    SELECT * FROM run_ratings WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_run_ratings
+SELECT * FROM run_ratings r
+WHERE r.date_id = (SELECT max(date_id) FROM run_ratings WHERE player_id = r.player_id);
+
+CREATE TRIGGER IF NOT EXISTS player_teams_latest_insert
+AFTER INSERT ON player_teams
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_player_teams WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_player_teams
+    SELECT * FROM player_teams WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_teams_latest_delete
+AFTER DELETE ON player_teams
+WHEN OLD.date_id = (SELECT date_id FROM latest_player_teams WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_player_teams WHERE player_id = OLD.player_id;
+    INSERT INTO latest_player_teams
+    SELECT * FROM player_teams WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_player_teams
+SELECT * FROM player_teams r
+WHERE r.date_id = (SELECT max(date_id) FROM player_teams WHERE player_id = r.player_id);
+
+CREATE TRIGGER IF NOT EXISTS pitch_ratings_latest_insert
+AFTER INSERT ON pitch_ratings
+WHEN NEW.date_id >= coalesce((SELECT date_id FROM latest_pitch_ratings WHERE player_id = NEW.player_id), 0)
+BEGIN
+    INSERT OR REPLACE INTO latest_pitch_ratings
+    SELECT * FROM pitch_ratings WHERE player_id = NEW.player_id AND date_id = NEW.date_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS pitch_ratings_latest_delete
+AFTER DELETE ON pitch_ratings
+WHEN OLD.date_id = (SELECT date_id FROM latest_pitch_ratings WHERE player_id = OLD.player_id)
+BEGIN
+    DELETE FROM latest_pitch_ratings WHERE player_id = OLD.player_id;
+    INSERT INTO latest_pitch_ratings
+    SELECT * FROM pitch_ratings WHERE player_id = OLD.player_id ORDER BY date_id DESC LIMIT 1;
+END;
+
+INSERT OR IGNORE INTO latest_pitch_ratings
+SELECT * FROM pitch_ratings r
+WHERE r.date_id = (SELECT max(date_id) FROM pitch_ratings WHERE player_id = r.player_id);
@@ -1,14 +1,23 @@
-import os
-import re
+import argparse
 import sqlite3
+import time
 
-from bs4 import BeautifulSoup
+from almanac import open_almanac
+from bulk_writer import BulkWriter, WRITE_BATCH_SIZE
+from checkpoint import Checkpoint
 from contextlib import closing
-from statscraper import season_pitching_stats, season_batting_stats
+from fast_index import FastIndex, NoMatch
+from manifest import Manifest
+from page_index import PageIndex
+from parsing import BACKEND, BACKENDS, parse, parse_player_page, set_backend
+from pipeline import Pipeline, READ_AHEAD
+from rating_cache import PITCH_COLUMNS, RatingCache, pitch_row
+from sections import SECTIONS, get_sections, read_sections, sections_key
 
 DATABASE = 'wbh.db'
 ROOT = '/Users/davidwen/Library/Application Support/Out of the Park Developments/OOTP Baseball 14/saved_games/WBH.lg/news/almanac_2035'
 LEAGUES = [100, 102, 104, 112, 116, 120, 124]
+POOL_CHUNKSIZE = 16
 
 RATINGS = {
     'Very High': 5,
@@ -18,15 +27,29 @@ RATINGS = {
     'Very Low': 1
 }
 
+INSERT_PITCH_RATINGS = '''
+    insert into pitch_ratings
+    (player_id, date_id, ''' + ', '.join(PITCH_COLUMNS) + ''')
+    values
+    (''' + ', '.join(['?'] * (len(PITCH_COLUMNS) + 2)) + ''')
+    '''
+
 class Scraper:
-    def __init__(self):
+    def __init__(self, sections=SECTIONS, extractor='soup'):
         self.date_id = None
-        self.batting_ratings = {}
-        self.pitching_ratings = {}
-        self.run_ratings = {}
-        self.fielding_ratings = {}
-        self.position_ratings = {}
-        self.pitch_ratings = {}
+        self.writer = None
+        self.almanac = None
+        self.sections = sections
+        # soup, fast (falling back to soup) or verify (both, writing soup's)
+        self.extractor = extractor
+        self.reset_timings()
+        self.batting_ratings = RatingCache(20)
+        self.pitching_ratings = RatingCache(14)
+        self.run_ratings = RatingCache(5)
+        self.fielding_ratings = RatingCache(9)
+        self.position_ratings = RatingCache(9)
+        self.pitch_ratings = RatingCache(len(PITCH_COLUMNS))
+        self.player_teams = RatingCache(1)
         self.existing_players = set()
         with closing(sqlite3.connect(DATABASE)) as db:
             self.populate_batting_ratings(db)
@@ -36,111 +59,86 @@ class Scraper:
             self.populate_position_ratings(db)
             self.populate_existing_players(db)
             self.populate_pitch_ratings(db)
+            self.populate_player_teams(db)
 
     def populate_batting_ratings(self, db):
         cur = db.cursor()
         cur.execute('''
             select
-              br.player_id,
-              br.contact, br.contact_l, br.contact_r, br.pot_contact,
-              br.gap, br.gap_l, br.gap_r, br.pot_gap,
-              br.power, br.power_l, br.power_r, br.pot_power,
-              br.eye, br.eye_l, br.eye_r, br.pot_eye,
-              br.avoid_k, br.avoid_k_l, br.avoid_k_r, br.pot_avoid_k
-            from batting_ratings br
-            left join batting_ratings br_later
-              on br_later.player_id = br.player_id
-              and br_later.date_id > br.date_id
-            where br_later.date_id is null
+              player_id,
+              contact, contact_l, contact_r, pot_contact,
+              gap, gap_l, gap_r, pot_gap,
+              power, power_l, power_r, pot_power,
+              eye, eye_l, eye_r, pot_eye,
+              avoid_k, avoid_k_l, avoid_k_r, pot_avoid_k
+            from latest_batting_ratings
             ''')
         for row in cur.fetchall():
-            self.batting_ratings[row[0]] = [row[i] for i in range(1, len(row))]
+            self.batting_ratings.set(row[0], row[1:])
 
     def populate_pitching_ratings(self, db):    
         cur = db.cursor()
         cur.execute('''
             select
-              pr.player_id,
-              pr.stuff, pr.stuff_l, pr.stuff_r, pr.pot_stuff,
-              pr.movement, pr.movement_l, pr.movement_r, pr.pot_movement,
-              pr.control, pr.control_l, pr.control_r, pr.pot_control,
-              pr.velocity, pr.stamina
-            from pitching_ratings pr
-            left join pitching_ratings pr_later
-              on pr_later.player_id = pr.player_id
-              and pr_later.date_id > pr.date_id
-            where pr_later.date_id is null
+              player_id,
+              stuff, stuff_l, stuff_r, pot_stuff,
+              movement, movement_l, movement_r, pot_movement,
+              control, control_l, control_r, pot_control,
+              velocity, stamina
+            from latest_pitching_ratings
             ''')
         for row in cur.fetchall():
-            self.pitching_ratings[row[0]] = [row[i] for i in range(1, len(row))]
+            self.pitching_ratings.set(row[0], row[1:])
 
     def populate_run_ratings(self, db):
         cur = db.cursor()
         cur.execute('''
             select
-              rr.player_id, rr.speed, rr.steal, rr.baserunning, rr.sac_bunt, rr.bunt_for_hit
-            from run_ratings rr
-            left join run_ratings rr_later
-              on rr_later.player_id = rr.player_id
-              and rr_later.date_id > rr.date_id
-            where rr_later.date_id is null
+              player_id, speed, steal, baserunning, sac_bunt, bunt_for_hit
+            from latest_run_ratings
             ''')
         for row in cur.fetchall():
-            self.run_ratings[row[0]] = [row[i] for i in range(1, len(row))]
+            self.run_ratings.set(row[0], row[1:])
 
     def populate_fielding_ratings(self, db):
         cur = db.cursor()
         cur.execute('''
             select
-              fr.player_id,
-              fr.catcher_arm, fr.catcher_ability,
-              fr.infield_range, fr.infield_errors, fr.infield_arm, fr.infield_turn_dp,
-              fr.outfield_range, fr.outfield_errors, fr.outfield_arm
-            from fielding_ratings fr
-            left join fielding_ratings fr_later
-              on fr_later.player_id = fr.player_id
-              and fr_later.date_id > fr.date_id
-            where fr_later.date_id is null
+              player_id,
+              catcher_arm, catcher_ability,
+              infield_range, infield_errors, infield_arm, infield_turn_dp,
+              outfield_range, outfield_errors, outfield_arm
+            from latest_fielding_ratings
             ''')
         for row in cur.fetchall():
-            self.fielding_ratings[row[0]] = [row[i] for i in range(1, len(row))]
+            self.fielding_ratings.set(row[0], row[1:])
 
     def populate_position_ratings(self, db):
         cur = db.cursor()
         cur.execute('''
             select
-              pr.player_id,
-              pr.p, pr.ss,
-              pr.c, pr.lf,
-              pr.first_b, pr.cf,
-              pr.second_b, pr.rf,
-              pr.third_b
-            from position_ratings pr
-            left join position_ratings pr_later
-              on pr_later.player_id = pr.player_id
-              and pr_later.date_id > pr.date_id
-            where pr_later.date_id is null
+              player_id,
+              p, ss,
+              c, lf,
+              first_b, cf,
+              second_b, rf,
+              third_b
+            from latest_position_ratings
             ''')
         for row in cur.fetchall():
-            self.position_ratings[row[0]] = [row[i] for i in range(1, len(row))]
+            self.position_ratings.set(row[0], row[1:])
 
     def populate_pitch_ratings(self, db):
         cur = db.cursor()
-        cur.execute('''
-            select
-              *
-            from pitching_ratings pr
-            left join pitching_ratings pr_later
-              on pr_later.player_id = pr.player_id
-              and pr_later.date_id > pr.date_id
-            where pr_later.date_id is null
-            ''')
-        col_names = [i[0] for i in cur.description]
+        cur.execute('select player_id, ' + ', '.join(PITCH_COLUMNS) + ' from latest_pitch_ratings')
+        for row in cur.fetchall():
+            self.pitch_ratings.set(row[0], row[1:])
+
+    def populate_player_teams(self, db):
+        cur = db.cursor()
+        cur.execute('select player_id, team_id from latest_player_teams')
         for row in cur.fetchall():
-            val = {}
-            for i in range(2, len(row)):
-                val[col_names[i]] = row[i]
-            self.pitch_ratings[row[0]] = val
+            self.player_teams.set(row[0], row[1:])
 
     def populate_existing_players(self, db):
         cur = db.cursor()
@@ -148,132 +146,110 @@ class Scraper:
         for row in cur.fetchall():
             self.existing_players.add(row[0])
 
-    def scrape(self):
-        with closing(sqlite3.connect(DATABASE)) as db:
-            for dirname, dirnames, filenames in os.walk(ROOT + '/players'):
-                for filename in filenames:
-                    if filename[0] == '.':
-                        continue
-                    player_id = int(filename[len('player_'):filename.find('.')])
-                    self.read_player_file(db, player_id, os.path.join(dirname, filename))
-            for league in LEAGUES:
-                filename = ROOT + '/leagues/league_' + str(league) + '_waiver_wire_block.html'
-                self.read_waiver_wire(db, filename)
-
-
-    def format_date(self, date):
-        date_parts = date.split('/')
-        return date_parts[2] + '-' + date_parts[0] + '-' + date_parts[1]
-
-    def convert(self, rating):
-        if rating == '-':
-            return None
-        return int(rating)
-
-    def read_initial_player_file(self, db, player_id, filename):
-        with open(filename, 'rb') as f:
-            soup = BeautifulSoup(f.read())
-
-            name = soup.find('div', class_='reptitle').text
-            name = name[name.find(' ') + 1:name.find('#') - 1].strip()
-
-            birthday = soup.find('td', class_='wrap').text
-            birthday = self.format_date(birthday)
-
-            personality = soup.find('td', width='172px')
-            personality_td = personality.find_all('td')
-            leadership = RATINGS[personality_td[1].text]
-            loyalty = RATINGS[personality_td[3].text]
-            desire_for_win = RATINGS[personality_td[5].text]
-            greed = RATINGS[personality_td[7].text]
-            intelligence = RATINGS[personality_td[9].text]
-            work_ethic = RATINGS[personality_td[11].text]
-
-            data_line = soup.find(text=re.compile('BATS:'))
-            position = data_line.split(' ')[0]
-            bats = data_line[data_line.find('BATS:') + 6: data_line.find('BATS:') + 7]
-            throws = data_line[data_line.find('THROWS:') + 8: data_line.find('THROWS:') + 9]
-
-            cur = db.cursor()
-            cur.execute('''
-                insert or ignore into players
-                (id, name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position)
-                values
-                (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (player_id, name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position))
-            db.commit()
-
-    def read_player_file(self, db, player_id, filename):
-        print player_id
-        if player_id not in self.existing_players:
-            self.read_initial_player_file(db, player_id, filename)
-        with open(filename, 'rb') as f:
-            soup = BeautifulSoup(f.read())
-            cur = db.cursor()
+    def scrape(self, workers=1, chunk_size=WRITE_BATCH_SIZE, full=False, resume=False, read_ahead=READ_AHEAD):
+        start = time.time()
+        with closing(sqlite3.connect(DATABASE)) as db, closing(open_almanac(ROOT)) as almanac:
+            self.writer = BulkWriter(db, chunk_size)
+            self.almanac = almanac
+            manifest = Manifest(db, 'scraper:' + sections_key(self.sections))
+            checkpoint = Checkpoint(db, 'scraper:' + sections_key(self.sections) + ':' + ROOT)
+            if resume and checkpoint.phase == 'done':
+                print 'Nothing to resume, the last run of %s finished' % ROOT
+                return
+            section_names = [section.name for section in self.sections]
+            pages = checkpoint.track(manifest.changed_pages(checkpoint.pages(almanac.player_pages(), resume), full))
+            job = lambda page: (page.player_id, page.read(), page.player_id not in self.existing_players, section_names, self.extractor)
+            with closing(Pipeline(pages, job, parse_player_file, workers, POOL_CHUNKSIZE, read_ahead)) as pipeline:
+                for player_id, page in pipeline.results():
+                    self.write_page(db, player_id, page)
+                    checkpoint.page_written(self.writer, manifest)
+            print '%d of %d files changed' % (manifest.changes, manifest.seen)
+            manifest.save(self.writer)
+            checkpoint.save(self.writer, 'waiver_wire')
+            self.writer.commit()
             if self.date_id is None:
-                self.set_date(cur, soup)
-
-            # self.set_team(cur, player_id, soup)
-            # self.set_batting_ratings(cur, player_id, soup)
-            # self.set_pitching_ratings(cur, player_id, soup)
-            # self.set_run_ratings(cur, player_id, soup)
-            # self.set_fielding_ratings(cur, player_id, soup)
-            # self.set_position_ratings(cur, player_id, soup)
-            self.set_pitch_ratings(cur, player_id, soup)
-            # if soup.find(text=re.compile('BATTING RATINGS')) is not None:
-            #     season_batting_stats(db, soup, player_id, 2035)
-            # elif soup.find(text=re.compile('PITCHING RATINGS')) is not None:
-            #     season_pitching_stats(db, soup, player_id, 2035)
-            db.commit()
-
-    def set_team(self, cur, player_id, soup):
-        team = 0
-        team_link = soup.find('a', class_='boxlink').get('href')
-        if team_link.find('team_.html') < 0:
-            team = int(team_link[team_link.find('team_') + 5:team_link.find('html') - 1])
-        cur.execute('''
-            select pt.team_id
-            from player_teams pt
-            left join player_teams pt_later
-              on pt_later.player_id = pt.player_id
-              and pt_later.date_id > pt.date_id
-            where pt_later.date_id is null
-            and pt.player_id = ?
-            ''', [player_id])
-        row = cur.fetchone()
-        old_team = None
-        if row is not None:
-            old_team = row[0]
-        if old_team != team:
+                # Nothing changed, but the waiver wire still needs this export's date
+                date = read_date(almanac)
+                if date is not None:
+                    self.set_date(db.cursor(), date)
+            self.finish(db)
+            checkpoint.save(self.writer, 'done')
+            self.writer.commit()
+            elapsed = time.time() - start
+            print '%d files in %.1fs (%.1f files/sec, %d workers, %d rows written)' % (
+                manifest.changes, elapsed, manifest.changes / max(elapsed, 0.001), workers, self.writer.count)
+            self.print_timings()
+            pipeline.print_stats()
+
+    def extract_page(self, player_id, index):
+        return extract_sections(index, player_id not in self.existing_players, self.sections)
+
+    def write_page(self, db, player_id, page):
+        print player_id
+        cur = db.cursor()
+        if self.date_id is None:
+            self.set_date(cur, page['date'])
+        if 'player' in page:
+            self.set_player(cur, player_id, page['player'])
+        for section in self.sections:
+            if page.get(section.name) is not None:
+                getattr(self, 'set_' + section.table)(cur, player_id, page[section.name])
+        for name in page['timings']:
+            self.timings[name] = self.timings.get(name, 0) + page['timings'][name]
+        if page.get('fallback'):
+            self.fallbacks += 1
+        if len(page.get('differences', [])) > 0:
+            self.differences += 1
+            for difference in page['differences']:
+                print 'Player %d differs in %s' % (player_id, difference)
+
+    def reset_timings(self):
+        self.timings = {}
+        self.fallbacks = 0
+        self.differences = 0
+
+    def print_timings(self):
+        # Worker time, summed across workers
+        for name in sorted(self.timings, key=self.timings.get, reverse=True):
+            print '%-10s %8.2fs' % (name, self.timings[name])
+        if self.extractor != 'soup':
+            print '%d pages fell back to BeautifulSoup' % self.fallbacks
+        if self.extractor == 'verify':
+            print '%d pages extracted differently' % self.differences
+
+    def finish(self, db):
+        for league in LEAGUES:
+            name = 'leagues/league_' + str(league) + '_waiver_wire_block.html'
+            self.read_waiver_wire(db, self.almanac.read(name))
+
+    def set_player(self, cur, player_id, player):
+        params = [player_id]
+        params.extend(player)
+        self.writer.add('''
+            insert or ignore into players
+            (id, name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position)
+            values
+            (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', params)
+        self.existing_players.add(player_id)
+
+    def set_player_teams(self, cur, player_id, team):
+        if self.player_teams.changed(player_id, [team]):
+            self.player_teams.set(player_id, [team])
             params = [player_id, self.date_id, team]
-            cur.execute('''
+            self.writer.add('''
                 insert into player_teams
                 (player_id, date_id, team_id)
                 values
                 (?, ?, ?)
                 ''', params)
 
-    def set_batting_ratings(self, cur, player_id, soup):
-        if soup.find(text=re.compile('BATTING RATINGS')) is None:
-            return
-        ratings_table = soup.find_all('table', class_='data')[1]
-        ratings_rows = ratings_table.find_all('tr')
-        contacts = ratings_rows[2].find_all('td')
-        gaps = ratings_rows[3].find_all('td')
-        powers = ratings_rows[4].find_all('td')
-        eyes = ratings_rows[5].find_all('td')
-        ks = ratings_rows[6].find_all('td')
-        ratings = []
-        for attr in [contacts, gaps, powers, eyes, ks]:
-            ratings.extend([int(attr[i].text) for i in range(3, 7)])
-
-        old_ratings = []
-        if self.batting_ratings.has_key(player_id):
-            old_ratings = self.batting_ratings[player_id]
-        if old_ratings != ratings:
+    def set_batting_ratings(self, cur, player_id, ratings):
+        if self.batting_ratings.changed(player_id, ratings):
+            self.batting_ratings.set(player_id, ratings)
             params = [player_id, self.date_id]
             params.extend(ratings)
-            cur.execute('''
+            self.writer.add('''
                 insert into batting_ratings
                 (player_id, date_id,
                  contact, contact_l, contact_r, pot_contact,
@@ -290,36 +266,13 @@ class Scraper:
                  ?, ?, ?, ?)
                 ''', params)
 
-    def set_pitching_ratings(self, cur, player_id, soup):
-        if soup.find(text=re.compile('PITCHING RATINGS')) is None:
-            return
-        ratings_table = soup.find_all('table', class_='data')[1]
-        ratings_rows = ratings_table.find_all('tr')
-        stuffs = ratings_rows[2].find_all('td')
-        movements = ratings_rows[3].find_all('td')
-        controls = ratings_rows[4].find_all('td')
-
-        other_ratings_table = soup.find_all('table', class_='data')[3]
-        other_ratings_rows = other_ratings_table.find_all('tr')
-        velocity = other_ratings_rows[1].find_all('td')[1].text
-        velocity = int(velocity[velocity.find('-') + 1: velocity.find(' ')])
-        stamina = int(other_ratings_rows[2].find_all('td')[1].text)
-        groundball = int(other_ratings_rows[4].find_all('td')[1].text[:2])
-        hold = int(other_ratings_rows[5].find_all('td')[1].text)
-
-        ratings = []
-        for attr in [stuffs, movements, controls]:
-            ratings.extend([int(attr[i].text) for i in range(3, 7)])
-        ratings.extend([velocity, stamina])
-
-        old_ratings = []
-        if self.pitching_ratings.has_key(player_id):
-            old_ratings = self.pitching_ratings[player_id]
-        if old_ratings != ratings:
+    def set_pitching_ratings(self, cur, player_id, ratings):
+        # groundball and hold are stored but not compared
+        if self.pitching_ratings.changed(player_id, ratings[:14]):
+            self.pitching_ratings.set(player_id, ratings[:14])
             params = [player_id, self.date_id]
             params.extend(ratings)
-            params.extend([groundball, hold])
-            cur.execute('''
+            self.writer.add('''
                 insert into pitching_ratings
                 (player_id, date_id,
                  stuff, stuff_l, stuff_r, pot_stuff,   
@@ -334,24 +287,12 @@ class Scraper:
                  ?, ?, ?, ?)
                 ''', params)
 
-    def set_run_ratings(self, cur, player_id, soup):
-        ratings_table = soup.find_all('table', class_='data')[4]
-        ratings_rows = ratings_table.find_all('tr')
-        speed = int(ratings_rows[1].find_all('td')[1].text)
-        steal = int(ratings_rows[2].find_all('td')[1].text)
-        baserunning = int(ratings_rows[3].find_all('td')[1].text)
-        sac_bunt = int(ratings_rows[4].find_all('td')[1].text)
-        bunt_for_hit = int(ratings_rows[5].find_all('td')[1].text)
-
-        ratings = [speed, steal, baserunning, sac_bunt, bunt_for_hit]
-        
-        old_ratings = []
-        if self.run_ratings.has_key(player_id):
-            old_ratings = self.run_ratings[player_id]
-        if old_ratings != ratings:
+    def set_run_ratings(self, cur, player_id, ratings):
+        if self.run_ratings.changed(player_id, ratings):
+            self.run_ratings.set(player_id, ratings)
             params = [player_id, self.date_id]
             params.extend(ratings)
-            cur.execute('''
+            self.writer.add('''
                 insert into run_ratings
                 (player_id, date_id,
                  speed, steal, baserunning, sac_bunt, bunt_for_hit)
@@ -360,37 +301,12 @@ class Scraper:
                  ?, ?, ?, ?, ?)
                 ''', params)
 
-    def set_fielding_ratings(self, cur, player_id, soup):
-        if soup.find(text=re.compile('FIELDING RATINGS')) is None:
-            return
-        ratings_table = soup.find_all('table', class_='data')[2]
-        ratings_rows = ratings_table.find_all('tr')
-        ranges = ratings_rows[2].find_all('td')
-        errors = ratings_rows[3].find_all('td')
-        arms = ratings_rows[4].find_all('td')
-        turn_dps = ratings_rows[5].find_all('td')
-        abilities = ratings_rows[6].find_all('td')
-
-        catcher_arm = arms[1].text
-        catcher_ability = abilities[1].text
-        infield_range = ranges[2].text
-        infield_errors = errors[2].text
-        infield_arm = arms[2].text
-        infield_turn_dp = turn_dps[2].text
-        outfield_range = ranges[3].text
-        outfield_errors = errors[3].text
-        outfield_arm = arms[3].text
-
-        ratings = [catcher_arm, catcher_ability, infield_range, infield_errors, infield_arm, infield_turn_dp, outfield_range, outfield_errors, outfield_arm]
-        ratings = [self.convert(rating) for rating in ratings]
-        
-        old_ratings = []
-        if self.fielding_ratings.has_key(player_id):
-            old_ratings = self.fielding_ratings[player_id]
-        if old_ratings != ratings:
+    def set_fielding_ratings(self, cur, player_id, ratings):
+        if self.fielding_ratings.changed(player_id, ratings):
+            self.fielding_ratings.set(player_id, ratings)
             params = [player_id, self.date_id]
             params.extend(ratings)
-            cur.execute('''
+            self.writer.add('''
                 insert into fielding_ratings
                 (player_id, date_id,
                  catcher_arm, catcher_ability,
@@ -403,21 +319,12 @@ class Scraper:
                  ?, ?, ?)
                 ''', params)
 
-    def set_position_ratings(self, cur, player_id, soup):
-        if soup.find(text=re.compile('POSITION RATINGS')) is None:
-            return
-        ratings_table = soup.find_all('table', class_='data')[3]
-        ratings_cells = ratings_table.find_all('td')
-        ratings = [ratings_cells[i].text for i in range(1, 18, 2)]
-        ratings = [self.convert(rating) for rating in ratings]
-        
-        old_ratings = []
-        if self.position_ratings.has_key(player_id):
-            old_ratings = self.position_ratings[player_id]
-        if old_ratings != ratings:
+    def set_position_ratings(self, cur, player_id, ratings):
+        if self.position_ratings.changed(player_id, ratings):
+            self.position_ratings.set(player_id, ratings)
             params = [player_id, self.date_id]
             params.extend(ratings)
-            cur.execute('''
+            self.writer.add('''
                 insert into position_ratings
                 (player_id, date_id,
                  p, ss,
@@ -434,79 +341,157 @@ class Scraper:
                  ?)
                 ''', params)        
 
-    def set_pitch_ratings(self, cur, player_id, soup):
-        if soup.find(text=re.compile('PITCHING RATINGS')) is None:
-            return
-        ratings_table = soup.find_all('table', class_='data')[2]
-        ratings_rows = ratings_table.find_all('tr')
-        
-        ratings = {}
-        for row in ratings_rows[2:]:
-            tds = row.find_all('td')
-            if len(tds[0].text.strip()) == 0:
-                continue
-            pitch = tds[0].text.lower().replace(' ', '_')
-            ratings[pitch] = int(tds[1].text)
-            ratings['pot_' + pitch] = int(tds[2].text)
-
-        old_ratings = {}
-        if self.pitch_ratings.has_key(player_id):
-            old_ratings = self.pitch_ratings[player_id]
-        if old_ratings != ratings:
-            sql = ['player_id', 'date_id']
-            params = [player_id, self.date_id]
-            for pitch in ratings:
-                sql.append(pitch)
-                params.append(ratings[pitch])
-            cur.execute('''
-                insert into pitch_ratings
-                (''' +
-                ','.join(sql) +
-                ''')
-                values
-                (''' +
-                ','.join(['?' for i in params]) +
-                ''')
-                ''', params)
-
-    def set_date(self, cur, soup):
-        date = soup.find('div', style='text-align:center; color:#000000; padding-top:4px;').text
-        date = self.format_date(date)
+    def set_pitch_ratings(self, cur, player_id, ratings):
+        row = pitch_row(ratings)
+        if self.pitch_ratings.changed(player_id, row):
+            self.pitch_ratings.set(player_id, row)
+            self.writer.add(INSERT_PITCH_RATINGS, [player_id, self.date_id] + row)
+
+    def set_date(self, cur, date):
+        self.date_id = get_date_id(cur, date)
+
+    def read_waiver_wire(self, db, html):
+        soup = parse(html)
+
+        links = soup.find_all('a')
+        for link in links:
+            href = link.get('href')
+            if href.find('/players/') > 0:
+                player_id = int(href[href.find('player_') + 7 : href.find('html') - 1])
+                self.writer.add('''
+                    insert or ignore into waiver_wire
+                    (player_id, date_id)
+                    values
+                    (?, ?)
+                    ''', [player_id, self.date_id])
+
+def read_date(almanac):
+    for page in almanac.player_pages():
+        return extract_date(PageIndex(parse_player_page(page.read())))
+
+def parse_player_file(job):
+    # Runs in pool workers, so everything returned must be plain picklable data
+    player_id, html, is_new, section_names, extractor = job
+    sections = get_sections(section_names)
+    if extractor == 'soup':
+        return player_id, soup_extract(html, is_new, sections)
+    page = fast_extract(html, is_new, sections)
+    if page is None:
+        page = soup_extract(html, is_new, sections)
+        page['fallback'] = True
+    elif extractor == 'verify':
+        expected = soup_extract(html, is_new, sections)
+        expected['differences'] = compare_pages(page, expected)
+        page = expected
+    return player_id, page
+
+def soup_extract(html, is_new, sections):
+    start = time.time()
+    soup = parse_player_page(html)
+    parse_time = time.time() - start
+    start = time.time()
+    index = PageIndex(soup)
+    index_time = time.time() - start
+    page = extract_sections(index, is_new, sections)
+    page['timings']['parse'] = parse_time
+    page['timings']['index'] = index_time
+    return page
+
+def fast_extract(html, is_new, sections):
+    # None when the page is not laid out the way FastIndex expects
+    start = time.time()
+    try:
+        index = FastIndex(html)
+        index_time = time.time() - start
+        page = extract_sections(index, is_new, sections)
+    except (NoMatch, AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+    page['timings']['fast index'] = index_time
+    return page
+
+def compare_pages(page, expected):
+    differences = []
+    for key in sorted(expected):
+        if key != 'timings' and page.get(key) != expected[key]:
+            differences.append('%s: fast %r, soup %r' % (key, page.get(key), expected[key]))
+    return differences
+
+def extract_sections(index, is_new, sections):
+    timings = {}
+    page = read_sections(index, sections, timings)
+    page['date'] = extract_date(index)
+    if is_new:
+        page['player'] = extract_player(index)
+    page['timings'] = timings
+    return page
+
+def get_date_id(cur, date):
+    cur.execute('''
+        select id
+        from dates
+        where date = ?
+        ''', [date])
+    row = cur.fetchone()
+    if row is None:
         cur.execute('''
-            select id
-            from dates
-            where date = ?
+            insert into dates
+            (date)
+            values
+            (?)
             ''', [date])
-        row = cur.fetchone()
-        if row is None:
-            cur.execute('''
-                insert into dates
-                (date)
-                values
-                (?)
-                ''', [date])
-            self.date_id = cur.lastrowid
-        else:
-            self.date_id = row[0]
-
-    def read_waiver_wire(self, db, filename):
-        with open(filename, 'rb') as f:
-            soup = BeautifulSoup(f.read())
-            cur = db.cursor()
-
-            links = soup.find_all('a')
-            for link in links:
-                href = link.get('href')
-                if href.find('/players/') > 0:
-                    player_id = int(href[href.find('player_') + 7 : href.find('html') - 1])
-                    cur.execute('''
-                        insert into waiver_wire
-                        (player_id, date_id)
-                        values
-                        (?, ?)
-                        ''', [player_id, self.date_id])
-            db.commit()
+        return cur.lastrowid
+    return row[0]
+
+def format_date(date):
+    date_parts = date.split('/')
+    return date_parts[2] + '-' + date_parts[0] + '-' + date_parts[1]
+
+def extract_date(index):
+    date = index.node('date').text
+    return format_date(date)
+
+def extract_player(index):
+    name = index.node('title').text
+    name = name[name.find(' ') + 1:name.find('#') - 1].strip()
+
+    birthday = index.node('birthday').text
+    birthday = format_date(birthday)
+
+    personality = index.node('personality')
+    personality_td = personality.find_all('td')
+    leadership = RATINGS[personality_td[1].text]
+    loyalty = RATINGS[personality_td[3].text]
+    desire_for_win = RATINGS[personality_td[5].text]
+    greed = RATINGS[personality_td[7].text]
+    intelligence = RATINGS[personality_td[9].text]
+    work_ethic = RATINGS[personality_td[11].text]
+
+    data_line = unicode(index.header('BATS:'))
+    position = data_line.split(' ')[0]
+    bats = data_line[data_line.find('BATS:') + 6: data_line.find('BATS:') + 7]
+    throws = data_line[data_line.find('THROWS:') + 8: data_line.find('THROWS:') + 9]
+
+    return (name, birthday, leadership, loyalty, desire_for_win, greed, intelligence, work_ethic, bats, throws, position)
 
 if __name__ == '__main__':
-    scraper = Scraper()
-    scraper.scrape()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default=ROOT, help='almanac directory, or a .zip or .tar.gz of one')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--parser', default=BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument('--chunk-size', type=int, default=WRITE_BATCH_SIZE)
+    parser.add_argument('--full', action='store_true', help='reparse files the manifest says are unchanged')
+    parser.add_argument('--sections', default=','.join(section.name for section in SECTIONS))
+    parser.add_argument('--fast', action='store_true', help='read pages without building a tree where they allow it')
+    parser.add_argument('--verify', action='store_true', help='read pages both ways and print where they differ')
+    parser.add_argument('--resume', action='store_true', help='carry on from where an interrupted run stopped')
+    parser.add_argument('--read-ahead', type=int, default=READ_AHEAD, help='pages read before a parser is free for them')
+    args = parser.parse_args()
+    ROOT = args.root
+    set_backend(args.parser)
+    extractor = 'soup'
+    if args.verify:
+        extractor = 'verify'
+    elif args.fast:
+        extractor = 'fast'
+    scraper = Scraper(get_sections(args.sections.split(',')), extractor)
+    scraper.scrape(args.workers, args.chunk_size, args.full, args.resume, args.read_ahead)
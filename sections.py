@@ -0,0 +1,143 @@
+import time
+
+class Section:
+    # header: text that has to appear on the page for the section to exist
+    # tables: indexes into the page's table.data list, passed to extract in order
+    # node: key of one more PageIndex node to pass to extract
+    def __init__(self, name, table, extract, header=None, tables=(), node=None):
+        self.name = name
+        self.table = table
+        self.extract = extract
+        self.header = header
+        self.tables = tables
+        self.node = node
+
+    def read(self, index):
+        if self.header is not None and index.header(self.header) is None:
+            return None
+        nodes = [index.table(i) for i in self.tables]
+        if self.node is not None:
+            nodes.append(index.node(self.node))
+        return self.extract(*nodes)
+
+def convert(rating):
+    if rating == '-':
+        return None
+    return int(rating)
+
+def read_team(team_link):
+    team = 0
+    team_link = team_link.get('href')
+    if team_link.find('team_.html') < 0:
+        team = int(team_link[team_link.find('team_') + 5:team_link.find('html') - 1])
+    return team
+
+def read_batting_ratings(ratings_table):
+    ratings_rows = ratings_table.find_all('tr')
+    contacts = ratings_rows[2].find_all('td')
+    gaps = ratings_rows[3].find_all('td')
+    powers = ratings_rows[4].find_all('td')
+    eyes = ratings_rows[5].find_all('td')
+    ks = ratings_rows[6].find_all('td')
+    ratings = []
+    for attr in [contacts, gaps, powers, eyes, ks]:
+        ratings.extend([int(attr[i].text) for i in range(3, 7)])
+    return ratings
+
+def read_pitching_ratings(ratings_table, other_ratings_table):
+    ratings_rows = ratings_table.find_all('tr')
+    stuffs = ratings_rows[2].find_all('td')
+    movements = ratings_rows[3].find_all('td')
+    controls = ratings_rows[4].find_all('td')
+
+    other_ratings_rows = other_ratings_table.find_all('tr')
+    velocity = other_ratings_rows[1].find_all('td')[1].text
+    velocity = int(velocity[velocity.find('-') + 1: velocity.find(' ')])
+    stamina = int(other_ratings_rows[2].find_all('td')[1].text)
+    groundball = int(other_ratings_rows[4].find_all('td')[1].text[:2])
+    hold = int(other_ratings_rows[5].find_all('td')[1].text)
+
+    ratings = []
+    for attr in [stuffs, movements, controls]:
+        ratings.extend([int(attr[i].text) for i in range(3, 7)])
+    ratings.extend([velocity, stamina, groundball, hold])
+    return ratings
+
+def read_run_ratings(ratings_table):
+    ratings_rows = ratings_table.find_all('tr')
+    speed = int(ratings_rows[1].find_all('td')[1].text)
+    steal = int(ratings_rows[2].find_all('td')[1].text)
+    baserunning = int(ratings_rows[3].find_all('td')[1].text)
+    sac_bunt = int(ratings_rows[4].find_all('td')[1].text)
+    bunt_for_hit = int(ratings_rows[5].find_all('td')[1].text)
+    return [speed, steal, baserunning, sac_bunt, bunt_for_hit]
+
+def read_fielding_ratings(ratings_table):
+    ratings_rows = ratings_table.find_all('tr')
+    ranges = ratings_rows[2].find_all('td')
+    errors = ratings_rows[3].find_all('td')
+    arms = ratings_rows[4].find_all('td')
+    turn_dps = ratings_rows[5].find_all('td')
+    abilities = ratings_rows[6].find_all('td')
+
+    catcher_arm = arms[1].text
+    catcher_ability = abilities[1].text
+    infield_range = ranges[2].text
+    infield_errors = errors[2].text
+    infield_arm = arms[2].text
+    infield_turn_dp = turn_dps[2].text
+    outfield_range = ranges[3].text
+    outfield_errors = errors[3].text
+    outfield_arm = arms[3].text
+
+    ratings = [catcher_arm, catcher_ability, infield_range, infield_errors, infield_arm, infield_turn_dp, outfield_range, outfield_errors, outfield_arm]
+    return [convert(rating) for rating in ratings]
+
+def read_position_ratings(ratings_table):
+    ratings_cells = ratings_table.find_all('td')
+    ratings = [ratings_cells[i].text for i in range(1, 18, 2)]
+    return [convert(rating) for rating in ratings]
+
+def read_pitch_ratings(ratings_table):
+    ratings_rows = ratings_table.find_all('tr')
+
+    ratings = {}
+    for row in ratings_rows[2:]:
+        tds = row.find_all('td')
+        if len(tds[0].text.strip()) == 0:
+            continue
+        pitch = tds[0].text.lower().replace(' ', '_')
+        ratings[pitch] = int(tds[1].text)
+        ratings['pot_' + pitch] = int(tds[2].text)
+    return ratings
+
+SECTIONS = [
+    Section('team', 'player_teams', read_team, node='team_link'),
+    Section('batting', 'batting_ratings', read_batting_ratings, header='BATTING RATINGS', tables=[1]),
+    Section('pitching', 'pitching_ratings', read_pitching_ratings, header='PITCHING RATINGS', tables=[1, 3]),
+    Section('run', 'run_ratings', read_run_ratings, tables=[4]),
+    Section('fielding', 'fielding_ratings', read_fielding_ratings, header='FIELDING RATINGS', tables=[2]),
+    Section('position', 'position_ratings', read_position_ratings, header='POSITION RATINGS', tables=[3]),
+    Section('pitch', 'pitch_ratings', read_pitch_ratings, header='PITCHING RATINGS', tables=[2])
+]
+
+def get_sections(names):
+    known = [section.name for section in SECTIONS]
+    for name in names:
+        if name not in known:
+            raise ValueError('Unknown section: ' + name)
+    # Registry order, so rows are always written in the same order
+    return [section for section in SECTIONS if section.name in names]
+
+def sections_key(sections):
+    # Names a manifest by the sections it covers, since a page read for
+    # some sections still has to be read for the others
+    return ','.join(sorted(section.name for section in sections))
+
+def read_sections(index, sections, timings):
+    page = {}
+    for section in sections:
+        start = time.time()
+        page[section.name] = section.read(index)
+        timings[section.name] = timings.get(section.name, 0) + time.time() - start
+    return page
@@ -0,0 +1,95 @@
+import argparse
+import hashlib
+import random
+import threading
+import time
+
+from almanac import open_almanac
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from contextlib import closing
+from email.utils import formatdate
+from SocketServer import ThreadingMixIn
+
+# Stands in for the league site, serving an almanac (as written by
+# gen_almanac.py, or a real export) at http://localhost:<port>/ so
+# statscraper's fetcher can be run against it:
+#   python serve_almanac.py <almanac> --failures 0.05
+#   python statscraper.py --url http://localhost:8000/
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class AlmanacHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1, so connections stay open between requests
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.delay > 0:
+            time.sleep(server.delay)
+        if random.random() < server.failures:
+            self.respond(503, 'Try again')
+            return
+        name = '/'.join(part for part in self.path.split('?')[0].split('/') if part not in ('', '.', '..'))
+        try:
+            with server.lock:
+                html = server.almanac.read(name)
+        except IOError:
+            self.respond(404, 'No page ' + name)
+            return
+        # Pages count as last modified when the server started
+        etag = '"%s"' % hashlib.md5(html).hexdigest()
+        if self.headers.get('If-None-Match') is not None:
+            unchanged = self.headers.get('If-None-Match') == etag
+        else:
+            unchanged = self.headers.get('If-Modified-Since') == server.last_modified
+        if unchanged:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.respond(200, html, etag)
+
+    def respond(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.server.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(root, port, delay=0, failures=0):
+    server = ThreadingHTTPServer(('localhost', port), AlmanacHandler)
+    server.almanac = open_almanac(root)
+    server.lock = threading.Lock()
+    server.delay = delay
+    server.failures = failures
+    server.last_modified = formatdate(time.time(), usegmt=True)
+    server.requests = 0
+    server.not_modified = 0
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('root', help='almanac directory, or a .zip or .tar.gz of one')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--delay', type=float, default=0, help='seconds added to every response')
+    parser.add_argument('--failures', type=float, default=0, help='share of requests answered with a 503')
+    args = parser.parse_args()
+    server = serve(args.root, args.port, args.delay, args.failures)
+    print 'Serving %s at http://localhost:%d/' % (args.root, args.port)
+    with closing(server.almanac):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    print '%d requests, %d answered not modified' % (server.requests, server.not_modified)
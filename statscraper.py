@@ -1,12 +1,19 @@
 import argparse
-import os
-import re
 import sqlite3
-import urllib2
 
-from bs4 import BeautifulSoup
+from almanac import open_almanac
+from checkpoint import Checkpoint
 from contextlib import closing
 from decimal import Decimal
+from fetcher import CONCURRENCY, Fetcher, RATE
+from http_cache import CACHE_DIR, CACHE_SIZE, HttpCache
+from page_index import PageIndex
+from parsing import parse_player_page
+from pipeline import Pipeline
+from scraper import POOL_CHUNKSIZE, LEAGUES
+
+import career_stats
+import player_discovery
 
 DATABASE = 'wbh.db'
 URL_ROOT = 'http://worldbaseballhierarchy.com/lgreports/news/html/'
@@ -103,48 +110,138 @@ BATTING_STATS = {
 
 BATTING_DECIMALS = set(['VORP', 'WAR'])
 
-def scrape():
-    with closing(sqlite3.connect(DATABASE)) as db:
-        for player_id in range(18170):
-            try:
-                response = urllib2.urlopen(URL_ROOT + '/players/player_%d.html' % player_id)
-                html = response.read()
-                soup = BeautifulSoup(html)
-                if soup.find(text=re.compile('BATTING RATINGS')) is not None:
-                    batting_stats(db, soup, player_id)
-                elif soup.find(text=re.compile('PITCHING RATINGS')) is not None:
-                    pitching_stats(db, soup, player_id)
-                    
-            except urllib2.HTTPError:
-                pass
-
-def pitching_stats(db, soup, player_id):
-    name = soup.find('div', class_='reptitle').text
+# Seasons before the current one
+YEARS = range(2006, 2035)
+
+INSERT_BATTING_STATS = '''
+    insert or replace into batting_stats
+    (player_id, name, position,
+     g, ab, h, double, triple, hr,
+     rbi, r, bb, hp, sf, k, sb, cs,
+     vorp, war, avg, obp, slg, ops, babip, krate, bbrate)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+INSERT_PITCHING_STATS = '''
+    insert or replace into pitching_stats
+    (player_id, name, g, gs, w, l, sv, ip, ha, r, er, hr, bb, k, cg, sho, vorp, war, era, whip, k9, bb9, kbb)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+INSERT_SEASON_BATTING_STATS = '''
+    insert or replace into season_batting_stats
+    (year, player_id, name, position,
+     g, ab, h, double, triple, hr,
+     rbi, r, bb, hp, sf, k, sb, cs,
+     vorp, war, avg, obp, slg, ops, babip, krate, bbrate)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+INSERT_SEASON_PITCHING_STATS = '''
+    insert or replace into season_pitching_stats
+    (year, player_id, name, g, gs, w, l, sv, ip, ha, r, er, hr, bb, k, cg, sho, vorp, war, era, whip, k9, bb9, kbb)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+def open_fetcher(concurrency=CONCURRENCY, rate=RATE, cache_dir=CACHE_DIR, cache_size=CACHE_SIZE, offline=False):
+    # No cache_dir, no cache
+    cache = None
+    if cache_dir:
+        cache = HttpCache(cache_dir, cache_size)
+    return Fetcher(URL_ROOT, concurrency, rate, cache=cache, offline=offline)
+
+def scrape(resume=False, workers=1, fetcher=None, probe=0):
+    if fetcher is None:
+        fetcher = open_fetcher()
+    with closing(sqlite3.connect(DATABASE)) as db, closing(fetcher):
+        checkpoint = Checkpoint(db, 'statscraper:' + URL_ROOT)
+        ids = known_ids(db, fetcher, probe)
+        pages = fetcher.fetch_all(player_pages(resume_ids(checkpoint, resume, ids)))
+        with closing(Pipeline(pages, lambda page: page, career_stats_rows, workers, POOL_CHUNKSIZE)) as pipeline:
+            for player_id, rows in pipeline.results():
+                insert_rows(db, player_id, rows)
+                checkpoint.reached(db, player_id, player_id)
+                db.commit()
+        checkpoint.save(db, 'done')
+        db.commit()
+        fetcher.print_stats()
+        pipeline.print_stats()
+
+def known_ids(db, fetcher, probe):
+    # Only players an index page links to, or already in the database,
+    # are asked for, rather than every id up to a guess at the highest
+    player_discovery.discover(db, fetcher, LEAGUES)
+    db.commit()
+    return player_discovery.player_ids(db, probe)
+
+def player_pages(player_ids):
+    for player_id in player_ids:
+        yield player_id, 'players/player_%d.html' % player_id
+
+def career_stats_rows(page):
+    # Runs in pool workers
+    player_id, html = page
+    if html is None:
+        return player_id, []
+    index = PageIndex(parse_player_page(html))
+    if index.header('BATTING RATINGS') is not None:
+        return player_id, [('batting', batting_stats_row(index, player_id))]
+    elif index.header('PITCHING RATINGS') is not None:
+        return player_id, [('pitching', pitching_stats_row(index, player_id))]
+    return player_id, []
+
+def season_stats_rows(page):
+    # Runs in pool workers
+    player_id, html = page
+    if html is None:
+        return player_id, []
+    index = PageIndex(parse_player_page(html))
+    if index.header('BATTING RATINGS') is not None:
+        return player_id, [('season_batting', row) for row in season_batting_rows(index, player_id, YEARS)]
+    elif index.header('PITCHING RATINGS') is not None:
+        return player_id, [('season_pitching', row) for row in season_pitching_rows(index, player_id, YEARS)]
+    return player_id, []
+
+def insert_rows(db, player_id, rows):
+    # All of a player's rows of a kind go in with one statement
+    for kind in sorted(INSERTS):
+        kind_rows = [row for row_kind, row in rows if row_kind == kind and row is not None]
+        if len(kind_rows) > 0:
+            print player_id
+            db.cursor().executemany(INSERTS[kind], kind_rows)
+
+def resume_ids(checkpoint, resume, player_ids):
+    # Player ids are fetched in order, so an id is also its position
+    if not resume or checkpoint.phase is None:
+        return player_ids
+    if checkpoint.phase == 'done':
+        print 'Nothing to resume, %s finished' % checkpoint.run_id
+        return []
+    return [player_id for player_id in player_ids if player_id > checkpoint.player_id]
+
+def pitching_stats_row(index, player_id):
+    name = index.node('title').text
     name = name[name.find(' ') + 1:name.find('#') - 1].strip()
 
-    header_table = soup.find(text=re.compile('Career Pitching Stats'))
+    header_table = index.header('Career Pitching Stats')
     table = header_table.find_parents('table')[0].find_next_sibling()
     rows = table.find_all('tr', class_='hsx')
     if len(rows) == 0:
-        return
+        return None
     result = {}
     for row in rows:
         values = [th.string for th in row.find_all('th')]
         add_pitching_stats(result, values)
     if result['IP'] == 0:
-        return
-    print player_id
+        return None
     compile_pitching_stats(result)
-    cur = db.cursor()
-    cur.execute('''
-        insert or replace into pitching_stats
-        (player_id, name, g, gs, w, l, sv, ip, ha, r, er, hr, bb, k, cg, sho, vorp, war, era, whip, k9, bb9, kbb)
-        values
-        (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (player_id, name, result['G'], result['GS'], result['W'], result['L'], result['SV'], result['IP'],
-              result['HA'], result['R'], result['ER'], result['HR'], result['BB'], result['K'], result['CG'],
-              result['SHO'], result['VORP'], result['WAR'], result['ERA'], result['WHIP']), result['K9'], result['BB9'], result['KBB'])
-    db.commit()
+    return (player_id, name, result['G'], result['GS'], result['W'], result['L'], result['SV'], result['IP'],
+            result['HA'], result['R'], result['ER'], result['HR'], result['BB'], result['K'], result['CG'],
+            result['SHO'], result['VORP'], result['WAR'], result['ERA'], result['WHIP'], result['K9'], result['BB9'], result['KBB'])
 
 def add_pitching_stats(result, values):
     for key in PITCHING_STATS:
@@ -176,51 +273,42 @@ def compile_pitching_stats(result):
     if BB > 0:
         result['KBB'] = round(float(K) / BB, 2)
 
-def batting_stats(db, soup, player_id):
-    name = soup.find('div', class_='reptitle').text
+def batting_stats_row(index, player_id):
+    name = index.node('title').text
     name = name[name.find(' ') + 1:name.find('#') - 1].strip()
     
-    fielding_header = soup.find(text=re.compile('CAREER FIELDING STATS'))
+    fielding_header = index.header('CAREER FIELDING STATS')
     fielding_table = fielding_header.find_parents('table')[0].find_next_sibling()
     rows = fielding_table.find_all('tr', class_='hsi')
     best = (None, 0)
     for row in rows:
         values = [th.string for th in row.find_all('th')]
         games = int(values[2])
-        position = values[1]
+        # Plain unicode, not the NavigableString, which would drag the whole
+        # tree along when the row is pickled back from a pool worker
+        position = unicode(values[1])
         if games > best[1]:
             best = (position, games)
     position = best[0]
     if position is None:
-        data_line = soup.find(text=re.compile('BATS:'))
+        data_line = index.header('BATS:')
         position = data_line.split(' ')[0]
 
-    header_table = soup.find(text=re.compile('Career Batting Stats'))
+    header_table = index.header('Career Batting Stats')
     table = header_table.find_parents('table')[0].find_next_sibling()
     rows = table.find_all('tr', class_='hsx')
     if len(rows) == 0:
-        return
+        return None
     result = {}
     for row in rows:
         values = [th.string for th in row.find_all('th')]
         add_batting_stats(result, values)
     if result['AB'] == 0:
-        return
-    print player_id
+        return None
     compile_batting_stats(result)
-    cur = db.cursor()
-    cur.execute('''
-        insert or replace into batting_stats
-        (player_id, name, position,
-         g, ab, h, double, triple, hr,
-         rbi, r, bb, hp, sf, k, sb, cs,
-         vorp, war, avg, obp, slg, ops, babip, krate, bbrate)
-        values
-        (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (player_id, name, position, result['G'], result['AB'], result['H'], result['_2B'], result['_3B'], result['HR'],
-              result['RBI'], result['R'], result['BB'], result['HP'], result['SF'], result['K'], result['SB'], result['CS'],
-              result['VORP'], result['WAR'], result['AVG'], result['OBP'], result['SLG'], result['OPS'], result['BABIP'], result['K%'], result['BB%']))
-    db.commit()
+    return (player_id, name, position, result['G'], result['AB'], result['H'], result['_2B'], result['_3B'], result['HR'],
+            result['RBI'], result['R'], result['BB'], result['HP'], result['SF'], result['K'], result['SB'], result['CS'],
+            result['VORP'], result['WAR'], result['AVG'], result['OBP'], result['SLG'], result['OPS'], result['BABIP'], result['K%'], result['BB%'])
 
 def add_batting_stats(result, values):
     for key in BATTING_STATS:
@@ -251,114 +339,197 @@ def compile_batting_stats(result):
     result['K%'] = round(float(K) / PA, 2)
     result['BB%'] = round(float(BB) / PA, 2)
 
-def season_scrape(year):
+def season_scrape(year, resume=False, workers=1, fetcher=None, probe=0):
     with closing(sqlite3.connect(DATABASE)) as db:
         if year == '2035':
-            for dirname, dirnames, filenames in os.walk(FILE_ROOT + '/players'):
-                for filename in filenames:
-                    if filename[0] == '.':
-                        continue
-                    player_id = int(filename[len('player_'):filename.find('.')])
-                    with open(os.path.join(dirname, filename), 'rb') as f:
-                        soup = BeautifulSoup(f.read())
-                        if soup.find(text=re.compile('BATTING RATINGS')) is not None:
-                            season_batting_stats(db, soup, player_id, int(year))
-                        elif soup.find(text=re.compile('PITCHING RATINGS')) is not None:
-                            season_pitching_stats(db, soup, player_id, int(year))
+            checkpoint = Checkpoint(db, 'statscraper:' + year + ':' + FILE_ROOT)
+            if resume and checkpoint.phase == 'done':
+                print 'Nothing to resume, %s finished' % checkpoint.run_id
+            with closing(open_almanac(FILE_ROOT)) as almanac:
+                for page in checkpoint.pages(almanac.player_pages(), resume):
+                    index = PageIndex(parse_player_page(page.read()))
+                    if index.header('BATTING RATINGS') is not None:
+                        season_batting_stats(db, index, page.player_id, int(year))
+                    elif index.header('PITCHING RATINGS') is not None:
+                        season_pitching_stats(db, index, page.player_id, int(year))
+                    checkpoint.reached(db, page.player_id, page.position)
+                    db.commit()
         else:
-            for player_id in range(18170):
-                try:
-                    response = urllib2.urlopen(URL_ROOT + '/players/player_%d.html' % player_id)
-                    html = response.read()
-                    soup = BeautifulSoup(html)
-                    if soup.find(text=re.compile('BATTING RATINGS')) is not None:
-                        for y in range(2006, 2035):
-                            season_batting_stats(db, soup, player_id, y)
-                    elif soup.find(text=re.compile('PITCHING RATINGS')) is not None:
-                        for y in range(2006, 2035):
-                            season_pitching_stats(db, soup, player_id, y)
-                except urllib2.HTTPError:
-                    pass
-
-def season_pitching_stats(db, soup, player_id, year):
-    name = soup.find('div', class_='reptitle').text
+            checkpoint = Checkpoint(db, 'statscraper:' + year + ':' + URL_ROOT)
+            if fetcher is None:
+                fetcher = open_fetcher()
+            with closing(fetcher):
+                ids = known_ids(db, fetcher, probe)
+                pages = fetcher.fetch_all(player_pages(resume_ids(checkpoint, resume, ids)))
+                with closing(Pipeline(pages, lambda page: page, season_stats_rows, workers, POOL_CHUNKSIZE)) as pipeline:
+                    for player_id, rows in pipeline.results():
+                        insert_rows(db, player_id, rows)
+                        checkpoint.reached(db, player_id, player_id)
+                        db.commit()
+                fetcher.print_stats()
+                pipeline.print_stats()
+        checkpoint.save(db, 'done')
+        if year == '2035':
+            career_stats.rebuild(db, int(year))
+        else:
+            career_stats.rebuild(db)
+        db.commit()
+
+def season_pitching_stats(db, index, player_id, year):
+    rows = season_pitching_rows(index, player_id, [year])
+    if len(rows) > 0:
+        insert_rows(db, player_id, [('season_pitching', row) for row in rows])
+        db.commit()
+
+def season_pitching_row(index, player_id, year):
+    rows = season_pitching_rows(index, player_id, [year])
+    if len(rows) == 0:
+        return None
+    return rows[0]
+
+def season_pitching_rows(index, player_id, years):
+    # Every season in years the page has, from one pass over the table
+    name = index.node('title').text
     name = name[name.find(' ') + 1:name.find('#') - 1].strip()
-    header_table = soup.find(text=re.compile('Career Pitching Stats'))
+    header_table = index.header('Career Pitching Stats')
     table = header_table.find_parents('table')[0].find_next_sibling()
-    rows = table.find_all('tr', class_=None)
-    rows = [row for row in rows if str(year) in row.contents[1].string]
+    last_rows = season_rows(table, years)
+    rows = []
+    for year in years:
+        if year not in last_rows:
+            continue
+        result = {}
+        values = [td.string for td in last_rows[year].find_all('td')]
+        add_pitching_stats(result, values)
+        if result['IP'] == 0:
+            continue
+        compile_pitching_stats(result)
+        rows.append((year, player_id, name, result['G'], result['GS'], result['W'], result['L'], result['SV'], result['IP'],
+                     result['HA'], result['R'], result['ER'], result['HR'], result['BB'], result['K'], result['CG'],
+                     result['SHO'], result['VORP'], result['WAR'], result['ERA'], result['WHIP'], result['K9'], result['BB9'], result['KBB']))
+    return rows
+
+def season_batting_stats(db, index, player_id, year):
+    rows = season_batting_rows(index, player_id, [year])
+    if len(rows) > 0:
+        insert_rows(db, player_id, [('season_batting', row) for row in rows])
+        db.commit()
+
+def season_batting_row(index, player_id, year):
+    rows = season_batting_rows(index, player_id, [year])
     if len(rows) == 0:
-        return
-    result = {}
-    values = [td.string for td in rows[-1].find_all('td')]
-    add_pitching_stats(result, values)
-    if result['IP'] == 0:
-        return
-    print player_id
-    compile_pitching_stats(result)
-    cur = db.cursor()
-    cur.execute('''
-        insert or replace into season_pitching_stats
-        (year, player_id, name, g, gs, w, l, sv, ip, ha, r, er, hr, bb, k, cg, sho, vorp, war, era, whip, k9, bb9, kbb)
-        values
-        (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (year, player_id, name, result['G'], result['GS'], result['W'], result['L'], result['SV'], result['IP'],
-              result['HA'], result['R'], result['ER'], result['HR'], result['BB'], result['K'], result['CG'],
-              result['SHO'], result['VORP'], result['WAR'], result['ERA'], result['WHIP'], result['K9'], result['BB9'], result['KBB']))
-    db.commit()
+        return None
+    return rows[0]
 
-def season_batting_stats(db, soup, player_id, year):
-    name = soup.find('div', class_='reptitle').text
+def season_batting_rows(index, player_id, years):
+    # Every season in years the page has, from one pass over each table
+    name = index.node('title').text
     name = name[name.find(' ') + 1:name.find('#') - 1].strip()
     
-    fielding_header = soup.find(text=re.compile('CAREER FIELDING STATS'))
+    fielding_header = index.header('CAREER FIELDING STATS')
     fielding_table = fielding_header.find_parents('table')[0].find_next_sibling()
-    rows = fielding_table.find_all('tr', class_=None)
-    rows = [row for row in rows if str(year) in row.contents[1].string]
-    best = (None, 0)
-    for row in rows:
+    positions = {}
+    for row in fielding_table.find_all('tr', class_=None):
+        row_years = years_of(row, years)
+        if len(row_years) == 0:
+            continue
         values = [td.string for td in row.find_all('td')]
         games = int(values[2])
-        position = values[1]
-        if games > best[1]:
-            best = (position, games)
-    position = best[0]
-    if position is None:
-        data_line = soup.find(text=re.compile('BATS:'))
-        position = data_line.split(' ')[0]
+        for year in row_years:
+            if games > positions.get(year, (None, 0))[1]:
+                positions[year] = (values[1], games)
 
-    header_table = soup.find(text=re.compile('Career Batting Stats'))
+    header_table = index.header('Career Batting Stats')
     table = header_table.find_parents('table')[0].find_next_sibling()
-    rows = table.find_all('tr', class_=None)
-    rows = [row for row in rows if str(year) in row.contents[1].string]
-    if len(rows) == 0:
-        return
-    result = {}
-    values = [td.string for td in rows[-1].find_all('td')]
-    add_batting_stats(result, values)
-    if result['AB'] == 0:
-        return
-    print player_id
-    compile_batting_stats(result)
-    cur = db.cursor()
-    cur.execute('''
-        insert or replace into season_batting_stats
-        (year, player_id, name, position,
-         g, ab, h, double, triple, hr,
-         rbi, r, bb, hp, sf, k, sb, cs,
-         vorp, war, avg, obp, slg, ops, babip, krate, bbrate)
-        values
-        (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (year, player_id, name, position, result['G'], result['AB'], result['H'], result['_2B'], result['_3B'], result['HR'],
-              result['RBI'], result['R'], result['BB'], result['HP'], result['SF'], result['K'], result['SB'], result['CS'],
-              result['VORP'], result['WAR'], result['AVG'], result['OBP'], result['SLG'], result['OPS'], result['BABIP'], result['K%'], result['BB%']))
-    db.commit()
+    last_rows = season_rows(table, years)
+    rows = []
+    for year in years:
+        if year not in last_rows:
+            continue
+        result = {}
+        values = [td.string for td in last_rows[year].find_all('td')]
+        add_batting_stats(result, values)
+        if result['AB'] == 0:
+            continue
+        compile_batting_stats(result)
+        position = positions.get(year, (None, 0))[0]
+        if position is None:
+            data_line = index.header('BATS:')
+            position = data_line.split(' ')[0]
+        rows.append((year, player_id, name, unicode(position), result['G'], result['AB'], result['H'], result['_2B'], result['_3B'], result['HR'],
+                     result['RBI'], result['R'], result['BB'], result['HP'], result['SF'], result['K'], result['SB'], result['CS'],
+                     result['VORP'], result['WAR'], result['AVG'], result['OBP'], result['SLG'], result['OPS'], result['BABIP'], result['K%'], result['BB%']))
+    return rows
+
+def season_rows(table, years):
+    # A season's line is the last row for its year; a player who moved
+    # mid-season has one row per team before it
+    last_rows = {}
+    for row in table.find_all('tr', class_=None):
+        for year in years_of(row, years):
+            last_rows[year] = row
+    return last_rows
+
+def years_of(row, years):
+    text = row.contents[1].string
+    if text is None:
+        return []
+    return [year for year in years if str(year) in text]
+
+INSERTS = {
+    'batting': INSERT_BATTING_STATS,
+    'pitching': INSERT_PITCHING_STATS,
+    'season_batting': INSERT_SEASON_BATTING_STATS,
+    'season_pitching': INSERT_SEASON_PITCHING_STATS
+}
+
+class SeasonStats:
+    def __init__(self, year):
+        self.year = year
+        self.writer = None
+
+    def extract_page(self, player_id, index):
+        if index.header('BATTING RATINGS') is not None:
+            return ('batting', season_batting_row(index, player_id, self.year))
+        elif index.header('PITCHING RATINGS') is not None:
+            return ('pitching', season_pitching_row(index, player_id, self.year))
+        # Neither a batter's nor a pitcher's page
+        return (None, None)
+
+    def write_page(self, db, player_id, page):
+        kind, row = page
+        if row is None:
+            return
+        if kind == 'batting':
+            self.writer.add(INSERT_SEASON_BATTING_STATS, row)
+        else:
+            self.writer.add(INSERT_SEASON_PITCHING_STATS, row)
+
+    def finish(self, db):
+        career_stats.rebuild(self.writer, self.year)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('year', default=None)
+    parser.add_argument('year', nargs='?', default=None)
+    parser.add_argument('--root', default=FILE_ROOT, help='almanac directory, or a .zip or .tar.gz of one')
+    parser.add_argument('--resume', action='store_true', help='carry on from where an interrupted run stopped')
+    parser.add_argument('--url', default=URL_ROOT, help='site the player pages are fetched from')
+    parser.add_argument('--workers', type=int, default=1, help='processes parsing fetched pages')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='pages fetched at once')
+    parser.add_argument('--rate', type=float, default=RATE, help='most requests a second to the site')
+    parser.add_argument('--cache', default=CACHE_DIR, help='directory fetched pages are kept in, or empty for none')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help='megabytes of pages kept')
+    parser.add_argument('--offline', action='store_true', help='read pages from the cache only')
+    parser.add_argument('--probe', type=int, default=0, help='also fetch every player id below this, linked or not')
     args = parser.parse_args()
+    if args.offline and not args.cache:
+        parser.error('--offline needs a --cache')
+    FILE_ROOT = args.root
+    URL_ROOT = args.url
+    fetcher = None
+    if args.year != '2035':
+        fetcher = open_fetcher(args.concurrency, args.rate, args.cache, args.cache_size, args.offline)
     if args.year:
-        season_scrape(args.year)
+        season_scrape(args.year, args.resume, args.workers, fetcher, args.probe)
     else:
-        scrape()
+        scrape(args.resume, args.workers, fetcher, args.probe)
@@ -1,75 +1,92 @@
-import os
-import re
+import argparse
 import sqlite3
 
-from bs4 import BeautifulSoup
+from almanac import open_almanac
 from contextlib import closing
+from parsing import parse
+from pipeline import Pipeline
 
 DATABASE = 'wbh.db'
 ROOT = '/Users/davidwen/Library/Application Support/Out of the Park Developments/OOTP Baseball 14/saved_games/WBH.lg/news/almanac_2035'
+LEAGUES = [100, 102, 104, 112, 116, 120, 124]
 
-class TeamPopulator:
-    def __init__(self):
-        self.ml_teams = []
+def extract_team_id(href):
+    return int(href[href.find('team_') + 5 : href.find('html') - 1])
+
+def read_league(html):
+    # Runs in pool workers. The major league teams of both divisions.
+    soup = parse(html)
+    table = soup.find_all('table', width='291px')[3]
+    links = table.find_all('a')
+    table = soup.find_all('table', width='291px')[5]
+    links.extend(table.find_all('a'))
+    return [extract_team_id(link['href']) for link in links]
 
-    def extract_team_id(self, href):
-        return int(href[href.find('team_') + 5 : href.find('html') - 1])
+def read_team(page):
+    # Runs in pool workers. The team's row and its affiliates', as they
+    # go in teams.
+    ml_team, html = page
+    soup = parse(html)
+    name = soup.find('div', class_='reptitle').text
+    teams = [(ml_team, name, u'ML', None)]
+    table = soup.find_all('table', width='291px')[7]
+    for row in table.find_all('tr'):
+        a = row.find('a')
+        if a is not None:
+            href = a['href']
+            full_name = a.find('img')['title']
+            name = full_name[:full_name.find('(')-1]
+            level = full_name[full_name.find('(')+1: full_name.find(')')]
+            teams.append((extract_team_id(href), name, level, ml_team))
+    return teams
 
-    def read_leagues(self):
-        leagues = [100, 102, 104, 112, 116, 120, 124]
-        for league in leagues:
-            filename = ROOT + '/leagues/league_' + str(league) + '_home.html'
-            with open(filename, 'rb') as f:
-                soup = BeautifulSoup(f.read())
-                self.read_league(soup)
+class TeamPopulator:
+    # Reads the org tree, league pages then team pages, parsing with a
+    # pool when there is more than one worker, and writes only the teams
+    # that are new or have changed, so it can be run again every sim
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.ml_teams = []
+        self.teams = []
 
-    def read_league(self, soup):
-        table = soup.find_all('table', width='291px')[3]
-        links = table.find_all('a')
-        table = soup.find_all('table', width='291px')[5]
-        links.extend(table.find_all('a'))
-        for link in links:
-            href = link['href']
-            self.ml_teams.append(self.extract_team_id(href))
+    def read_leagues(self, almanac):
+        names = ['leagues/league_' + str(league) + '_home.html' for league in LEAGUES]
+        with closing(Pipeline(names, almanac.read, read_league, self.workers)) as pipeline:
+            for ml_teams in pipeline.results():
+                self.ml_teams.extend(ml_teams)
 
-    def read_teams(self):
+    def read_teams(self, almanac):
+        job = lambda ml_team: (ml_team, almanac.read('teams/team_' + str(ml_team) + '.html'))
+        with closing(Pipeline(self.ml_teams, job, read_team, self.workers)) as pipeline:
+            for teams in pipeline.results():
+                self.teams.extend(teams)
         with closing(sqlite3.connect(DATABASE)) as db:
-            for ml_team in self.ml_teams:
-                filename = ROOT + '/teams/team_' + str(ml_team) + '.html'
-                with open(filename, 'rb') as f:
-                    soup = BeautifulSoup(f.read())
-                    cur = db.cursor()
-                    self.read_team(ml_team, cur, soup)
-            db.commit()
+            self.write_teams(db)
 
-    def read_team(self, ml_team, cur, soup):
-        name = soup.find('div', class_='reptitle').text
-        cur.execute('''
-            insert into teams
-            (id, name, level)
-            values
-            (?, ?, ?)
-            ''', [ml_team, name, 'ML'])
-        minor_teams = []
-        table = soup.find_all('table', width='291px')[7]
-        for row in table.find_all('tr'):
-            a = row.find('a')
-            if a is not None:
-                href = a['href']
-                full_name = a.find('img')['title']
-                name = full_name[:full_name.find('(')-1]
-                level = full_name[full_name.find('(')+1: full_name.find(')')]
-                minor_teams.extend([self.extract_team_id(href), name, level, ml_team])
-        cur.execute('''
-            insert into teams
+    def write_teams(self, db):
+        # Teams gone from the export are left alone, since player_teams
+        # history still points at them
+        cur = db.cursor()
+        cur.execute('select id, name, level, parent_id from teams')
+        existing = dict((row[0], row) for row in cur.fetchall())
+        changed = [team for team in self.teams if existing.get(team[0]) != team]
+        new = len([team for team in changed if team[0] not in existing])
+        cur.executemany('''
+            insert or replace into teams
             (id, name, level, parent_id)
             values
-            (?, ?, ?, ?),
-            (?, ?, ?, ?),
             (?, ?, ?, ?)
-            ''', minor_teams)
+            ''', changed)
+        db.commit()
+        print '%d teams: %d new, %d changed, %d unchanged' % (
+            len(self.teams), new, len(changed) - new, len(self.teams) - len(changed))
 
 if __name__ == '__main__':
-    team_populator = TeamPopulator()
-    team_populator.read_leagues()
-    team_populator.read_teams()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default=ROOT, help='almanac directory, or a .zip or .tar.gz of one')
+    parser.add_argument('--workers', type=int, default=1, help='processes parsing pages')
+    args = parser.parse_args()
+    with closing(open_almanac(args.root)) as almanac:
+        team_populator = TeamPopulator(args.workers)
+        team_populator.read_leagues(almanac)
+        team_populator.read_teams(almanac)
@@ -0,0 +1,82 @@
+import os
+import random
+import sqlite3
+import sys
+import unittest
+
+from bulk_writer import BulkWriter
+
+import career_stats
+import rate_stats
+
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+INSERT_BATTING = '''
+    insert into season_batting_stats
+    (year, player_id, name, position, g, ab, h, double, triple, hr, rbi, r, bb, hp, sf, k, sb, cs, vorp, war)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+INSERT_PITCHING = '''
+    insert into season_pitching_stats
+    (year, player_id, name, g, gs, w, l, sv, ip, ha, r, er, hr, bb, k, cg, sho, vorp, war)
+    values
+    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+def batting_season(rng, year, player_id):
+    ab = rng.randint(0, 600)
+    h = rng.randint(0, ab / 3 + 1)
+    return (year, player_id, 'Player%d' % player_id, rng.choice(['C', 'SS', 'CF']), rng.randint(1, 162),
+            ab, h, h / 5, h / 30, h / 10, h / 2, h / 2, rng.randint(0, 80), rng.randint(0, 10), rng.randint(0, 8),
+            rng.randint(0, 150), rng.randint(0, 30), rng.randint(0, 10), 1.5, 0.5)
+
+def pitching_season(rng, year, player_id):
+    ip = float('%d.%d' % (rng.randint(0, 200), rng.randint(0, 2)))
+    return (year, player_id, 'Player%d' % player_id, rng.randint(1, 40), rng.randint(0, 33), rng.randint(0, 20),
+            rng.randint(0, 20), rng.randint(0, 30), ip, rng.randint(0, 200), rng.randint(0, 90), rng.randint(0, 80),
+            rng.randint(0, 20), rng.randint(0, 70), rng.randint(0, 200), 0, 0, 1.5, 0.5)
+
+class RebuildTest(unittest.TestCase):
+    # Careers summed in SQL must get the same rates rate_stats would give
+    # them, halves included
+    def setUp(self):
+        self.db = sqlite3.connect(':memory:')
+        with open(SCHEMA) as f:
+            self.db.executescript(f.read())
+        rng = random.Random(0)
+        for player_id in range(300):
+            for year in range(2030, 2036):
+                self.db.execute(INSERT_BATTING, batting_season(rng, year, player_id))
+                self.db.execute(INSERT_PITCHING, pitching_season(rng, year, player_id))
+        # An ERA of exactly 4.095 and a K/BB of exactly 3.025
+        self.db.execute(INSERT_PITCHING, (2035, 1000, 'Tie', 30, 30, 10, 10, 0, 800.0, 797, 396, 364, 74, 264, 797, 0, 0, 1.5, 0.5))
+        self.db.execute(INSERT_PITCHING, (2035, 1001, 'Tie', 30, 30, 10, 10, 0, 973.0, 968, 482, 452, 93, 320, 968, 0, 0, 1.5, 0.5))
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+        self.db.close()
+
+    def changed_careers(self):
+        return (rate_stats.recompute(self.db, 'batting_stats', rate_stats.BATTING_COUNTS, rate_stats.BATTING_RATES,
+                                     rate_stats.batting_rates, dry_run=True) +
+                rate_stats.recompute(self.db, 'pitching_stats', rate_stats.PITCHING_COUNTS, rate_stats.PITCHING_RATES,
+                                     rate_stats.pitching_rates, dry_run=True))
+
+    def test_full_rebuild(self):
+        career_stats.rebuild(self.db)
+        self.assertEqual(0, self.changed_careers())
+
+    def test_year_rebuild_through_writer(self):
+        career_stats.rebuild(self.db)
+        writer = BulkWriter(self.db)
+        writer.add(INSERT_BATTING, batting_season(random.Random(1), 2036, 5))
+        career_stats.rebuild(writer, 2036)
+        self.assertEqual(0, self.changed_careers())
+
+if __name__ == '__main__':
+    unittest.main()
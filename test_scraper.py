@@ -0,0 +1,67 @@
+import datetime
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+from contextlib import closing
+from sections import get_sections
+
+import gen_almanac
+import ingest
+import scraper
+
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+TABLES = ['batting_ratings', 'pitching_ratings', 'run_ratings', 'fielding_ratings', 'position_ratings', 'pitch_ratings']
+
+class PartialThenFullTest(unittest.TestCase):
+    # A run with only some sections must not leave pages marked as read
+    # for a later run with all of them
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = os.path.join(self.directory, 'almanac_2035')
+        leagues, affiliates, team_ids = gen_almanac.build_teams(1)
+        gen_almanac.write_snapshot(self.root, datetime.date(2035, 4, 1), 0, [0] * 40, leagues, affiliates, team_ids)
+        self.database = os.path.join(self.directory, 'wbh.db')
+        with closing(sqlite3.connect(self.database)) as db, open(SCHEMA) as f:
+            db.executescript(f.read())
+        self.saved = (scraper.DATABASE, scraper.ROOT, ingest.DATABASE)
+        scraper.DATABASE = ingest.DATABASE = self.database
+        scraper.ROOT = self.root
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+        scraper.DATABASE, scraper.ROOT, ingest.DATABASE = self.saved
+        shutil.rmtree(self.directory)
+
+    def counts(self):
+        with closing(sqlite3.connect(self.database)) as db:
+            return dict((table, db.execute('select count(*) from ' + table).fetchone()[0]) for table in TABLES)
+
+    def assert_all_filled(self):
+        for table, count in self.counts().items():
+            self.assertTrue(count > 0, '%s is empty' % table)
+
+    def test_scraper(self):
+        scraper.Scraper(get_sections(['pitch'])).scrape()
+        self.assertEqual(0, self.counts()['batting_ratings'])
+        scraper.Scraper().scrape()
+        self.assert_all_filled()
+
+    def test_ingest(self):
+        engine = ingest.IngestEngine(self.root)
+        engine.register('ratings', scraper.Scraper(get_sections(['pitch'])))
+        engine.run()
+        self.assertEqual(0, self.counts()['batting_ratings'])
+        engine = ingest.IngestEngine(self.root)
+        engine.register('ratings', scraper.Scraper())
+        engine.run()
+        self.assert_all_filled()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import pickle
+import random
+import unittest
+
+from page_index import PageIndex
+from parsing import parse_player_page
+
+import gen_almanac
+import statscraper
+
+NO_RATINGS_PAGE = '''<html><body>
+<div class="reptitle">Coach Name #1</div>
+<table class="data"><tr><td>Nothing rated</td></tr></table>
+</body></html>'''
+
+def batter_page():
+    # A gen_almanac batter, with a career fielding line added as the hsi
+    # row real pages have
+    for seed in range(100):
+        team_id, html = gen_almanac.player_page(random.Random(seed), 1, '04/01/2035', 2035, [0, 1])
+        if 'BATTING RATINGS' in html:
+            start = html.index('CAREER FIELDING STATS')
+            end = html.index('</table>', html.index('<table class="data">', start))
+            return html[:end] + '<tr class="hsi"><th>WBH</th><th>SS</th><th>120</th></tr>\n' + html[end:]
+
+class CareerStatsRowsTest(unittest.TestCase):
+    def test_rows_pickle_as_plain_values(self):
+        result = statscraper.career_stats_rows((1, batter_page()))
+        kind, row = result[1][0]
+        self.assertEqual('batting', kind)
+        self.assertEqual(u'SS', row[2])
+        for value in row:
+            self.assertTrue(type(value) in (int, long, float, unicode, str, type(None)), repr(type(value)))
+        self.assertEqual(result, pickle.loads(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)))
+
+class SeasonStatsTest(unittest.TestCase):
+    def test_page_without_ratings(self):
+        season_stats = statscraper.SeasonStats(2035)
+        page = season_stats.extract_page(1, PageIndex(parse_player_page(NO_RATINGS_PAGE)))
+        # No writer, so anything written would fail
+        season_stats.write_page(None, 1, page)
+
+if __name__ == '__main__':
+    unittest.main()
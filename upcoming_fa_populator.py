@@ -1,51 +1,74 @@
-import os
-import re
+import argparse
 import sqlite3
 
-from bs4 import BeautifulSoup
+from almanac import open_almanac
+from bulk_writer import load_player_ids
 from contextlib import closing
+from parsing import parse
+from pipeline import Pipeline
+
+import scraper
 
 DATABASE = 'wbh.db'
 ROOT = '/Users/davidwen/Library/Application Support/Out of the Park Developments/OOTP Baseball 14/saved_games/WBH.lg/news/almanac_2035'
+LEAGUES = [100, 102, 104, 112, 116, 120, 124]
+
+def extract_player_id(href):
+    return int(href[href.find('player_') + 7 : href.find('html') - 1])
+
+def read_report(html):
+    # Runs in pool workers
+    table = parse(html).find('table', class_='sortable')
+    links = table.find_all('a')
+    return [extract_player_id(link['href']) for link in links if 'players' in link['href']]
 
 class UpcomingFreeAgentPopulator:
-    def __init__(self):
+    def __init__(self, workers=1):
+        self.workers = workers
         self.players = []
+        self.date = None
 
-    def extract_player_id(self, href):
-        return int(href[href.find('player_') + 7 : href.find('html') - 1])
-
-    def read_leagues(self):
-        leagues = [100, 102, 104, 112, 116, 120, 124]
-        for league in leagues:
-            for i in range(2):
-                filename = ROOT + '/leagues/league_' + str(league) + '_upcoming_free_agents_report_' + str(i) + '.html'
-                with open(filename, 'rb') as f:
-                    soup = BeautifulSoup(f.read())
-                    self.read_league(soup)
-
-    def read_league(self, soup):
-        table = soup.find('table', class_='sortable')
-        links = table.find_all('a')
-        for link in links:
-            href = link['href']
-            if 'players' in href:
-                self.players.append(self.extract_player_id(href))
+    def read_leagues(self, almanac):
+        self.date = scraper.read_date(almanac)
+        names = ['leagues/league_' + str(league) + '_upcoming_free_agents_report_' + str(i) + '.html'
+                 for league in LEAGUES for i in range(2)]
+        with closing(Pipeline(names, almanac.read, read_report, self.workers)) as pipeline:
+            for players in pipeline.results():
+                self.players.extend(players)
 
     def insert(self):
+        # Only the difference is written, in one transaction, so a reader
+        # sees the old list or the new one and never part of either. The
+        # list is also kept in upcoming_fa_history under the export's date.
         with closing(sqlite3.connect(DATABASE)) as db:
             cur = db.cursor()
-            cur.execute('delete from upcoming_fa')
-            for player in self.players:
+            load_player_ids(cur, 'read_fa', self.players)
+            cur.execute('''
+                delete from upcoming_fa
+                where player_id not in (select player_id from read_fa)
+                ''')
+            departed = cur.rowcount
+            cur.execute('''
+                insert or ignore into upcoming_fa
+                (player_id)
+                select player_id from read_fa
+                ''')
+            new = cur.rowcount
+            if self.date is not None:
                 cur.execute('''
-                    insert into upcoming_fa
-                    (player_id)
-                    values
-                    (?)
-                    ''', [player])
+                    insert or ignore into upcoming_fa_history
+                    (player_id, date_id)
+                    select player_id, ? from read_fa
+                    ''', [scraper.get_date_id(cur, self.date)])
             db.commit()
+            print '%d upcoming free agents: %d new, %d gone' % (len(set(self.players)), new, departed)
 
 if __name__ == '__main__':
-    populator = UpcomingFreeAgentPopulator()
-    populator.read_leagues()
-    populator.insert()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default=ROOT, help='almanac directory, or a .zip or .tar.gz of one')
+    parser.add_argument('--workers', type=int, default=1, help='processes parsing pages')
+    args = parser.parse_args()
+    with closing(open_almanac(args.root)) as almanac:
+        populator = UpcomingFreeAgentPopulator(args.workers)
+        populator.read_leagues(almanac)
+    populator.insert()
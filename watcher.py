@@ -0,0 +1,66 @@
+import glob
+import os
+import time
+
+from almanac import almanac_year
+
+# Everything the ingest reads from an export
+WATCHED = ['players', 'leagues']
+
+def latest_almanac(news):
+    roots = [path for path in glob.glob(os.path.join(news, 'almanac_*')) if os.path.isdir(path)]
+    if len(roots) == 0:
+        return None
+    return max(roots, key=almanac_year)
+
+def scan(root):
+    stats = {}
+    for directory in WATCHED:
+        for dirname, dirnames, filenames in os.walk(os.path.join(root, directory)):
+            for filename in filenames:
+                if filename[0] == '.':
+                    continue
+                path = os.path.join(dirname, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Removed between the listing and the stat
+                    continue
+                stats[path] = (stat.st_size, stat.st_mtime)
+    return stats
+
+class Watcher:
+    # Polls instead of using inotify, which OS X, where the saves live,
+    # does not have. A poll is one stat per file and reads nothing.
+    def __init__(self, news, interval=5, quiet=10):
+        self.news = news
+        self.interval = interval
+        self.quiet = quiet
+        self.root = latest_almanac(news)
+        self.stats = {}
+        if self.root is not None:
+            self.stats = scan(self.root)
+
+    def wait(self):
+        # Returns the export's root and the files that changed once they
+        # have stopped changing for quiet seconds, so OOTP is done writing.
+        # A newer almanac_YYYY folder counts as entirely changed.
+        pending = set()
+        last_change = None
+        while True:
+            time.sleep(self.interval)
+            root = latest_almanac(self.news)
+            if root is None:
+                continue
+            if root != self.root:
+                self.root = root
+                self.stats = {}
+                pending = set()
+            stats = scan(root)
+            changed = [path for path, stat in stats.iteritems() if self.stats.get(path) != stat]
+            self.stats = stats
+            if len(changed) > 0:
+                pending.update(changed)
+                last_change = time.time()
+            elif len(pending) > 0 and time.time() - last_change >= self.quiet:
+                return root, pending